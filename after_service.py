@@ -5,10 +5,12 @@ from mysql.connector import Error
 import logging
 import os
 from datetime import datetime
+from utils.cache import clear_write_caches
 
 logger = logging.getLogger(__name__)
 
 after_service_bp = Blueprint('after_service', __name__)
+after_service_bp.after_request(clear_write_caches)
 
 def get_db_config():
     """Get database configuration with test environment support"""
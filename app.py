@@ -30,6 +30,17 @@ def create_app(test_config=None):
     else:
         app.config.from_mapping(test_config)
 
+    # Don't re-sign the session cookie on views that only read the session
+    from utils.session import ReadOnlyAwareSessionInterface
+    app.session_interface = ReadOnlyAwareSessionInterface()
+
+    # Faster JSON serialization (falls back to Flask's stdlib provider if orjson is missing)
+    try:
+        from utils.json_provider import ORJSONProvider
+        app.json = ORJSONProvider(app)
+    except ImportError as e:
+        logger.warning("⚠️ orjson not available, using default JSON provider: %s", e)
+
     # Enable CORS
     CORS(app, supports_credentials=True, resources={
         r"/*": {
@@ -4,8 +4,10 @@ from mysql.connector import Error
 import logging
 from utils.database import get_connection, _safe_close
 from utils.helpers import serialize
+from utils.cache import clear_write_caches
 
 appointment_bp = Blueprint('appointments', __name__)
+appointment_bp.after_request(clear_write_caches)
 logger = logging.getLogger(__name__)
 
 # Template routes
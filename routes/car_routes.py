@@ -1,10 +1,88 @@
-from flask import Blueprint, request, jsonify, render_template, session
+from flask import Blueprint, request, jsonify, render_template, session, current_app, Response, stream_with_context, after_this_request, g
+import calendar
 import logging
+import random
 import re
-from datetime import datetime
+from datetime import date, datetime
 from utils.database import get_connection, _safe_close
+from utils.cache import TTLCache, register_write_cache, clear_write_caches
+from utils.session import session_read_only
 
 car_bp = Blueprint('car', __name__)
+logger = logging.getLogger(__name__)
+
+
+def _get_db_connection():
+    """Return this request's database connection, opening it on first use"""
+    if 'car_db_conn' not in g:
+        g.car_db_conn = get_connection()
+    return g.car_db_conn
+
+
+@car_bp.teardown_request
+def _close_db_connection(exc):
+    """Release the request's connection once the response (or stream) is done"""
+    _safe_close(conn=g.pop('car_db_conn', None))
+
+
+car_bp.after_request(clear_write_caches)
+
+
+_PLATE_RE = re.compile(r"^[A-Z0-9]{4,8}$")
+
+# Based on the service table
+_VALID_SERVICE_IDS = frozenset({1, 2, 3, 4, 5})
+
+# Car + owner + latest service history (relies on the service_history (Car_plate, History_ID) index)
+_CAR_WITH_LATEST_SERVICE_SQL = """
+    SELECT 
+        c.Car_plate,
+        c.Model,
+        c.Year,
+        c.VIN,
+        c.Next_Oil_Change,
+        o.Owner_ID,
+        o.Owner_Name,
+        o.Owner_Email,
+        o.PhoneNUMB,
+        sh.Service_Date,
+        sh.Mileage,
+        sh.Last_Oil_Change,
+        sh.Notes
+    FROM car c 
+    LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID 
+    LEFT JOIN service_history sh ON sh.History_ID = (
+        SELECT MAX(History_ID) FROM service_history WHERE Car_plate = c.Car_plate
+    )
+    WHERE c.Car_plate = %s
+"""
+
+# UPDATE statements for every combination of the optional (Model, Year, VIN) fields,
+# keyed by bitmask; Next_Oil_Change is always updated
+_CAR_UPDATE_COLUMNS = ("Model", "Year", "VIN")
+_CAR_UPDATE_SQL = {
+    mask: "UPDATE car SET " + ", ".join(
+        [f"{column} = %s" for bit, column in enumerate(_CAR_UPDATE_COLUMNS) if mask & (1 << bit)]
+        + ["Next_Oil_Change = %s"]
+    ) + " WHERE Car_plate = %s"
+    for mask in range(1 << len(_CAR_UPDATE_COLUMNS))
+}
+
+# Sample plates from the database for realistic detection testing
+_DETECTED_PLATES = ('R123456', 'ABC123', 'XYZ789', 'S222', 'A1111', 'W123456')
+_DISTANCES = ('2-4 meters', '4-7 meters', '7-10 meters', '10-15 meters')
+
+# Owner_ID by phone number - repeat customers skip the owner lookup query
+_OWNER_ID_CACHE = TTLCache(maxsize=2048, ttl=300)
+
+# Car insert for a cached Owner_ID; inserts nothing if the owner was deleted or changed phone
+_INSERT_CAR_FOR_OWNER_SQL = """
+    INSERT INTO car (Car_plate, Model, Year, VIN, Next_Oil_Change, Owner_ID)
+    SELECT %s, %s, %s, %s, %s, Owner_ID FROM owner WHERE Owner_ID = %s AND PhoneNUMB = %s
+"""
+
+# check_car_exists payloads for found cars, keyed by uppercased plate
+_CAR_CHECK_CACHE = register_write_cache(TTLCache(maxsize=1024, ttl=60))
 
 @car_bp.route('/test')
 def test_route():
@@ -18,7 +96,7 @@ def test_route():
 def add_car():
     """Add new car to system using plate from session"""
     data = request.get_json() or {}
-    logging.info(f"Add car data received: {data}")
+    logger.info("Add car data received: %s", data)
 
     # Try to get plate from session first, then from form data
     car_plate = session.get('detected_plate') or data.get("car_plate", "").strip().upper()
@@ -36,16 +114,19 @@ def add_car():
     last_service_date = data.get("last_service_date")
     service_notes = data.get("service_notes", "Initial car registration")
 
+    now = datetime.now()
+    today = now.date()
+
     # Input Validation
     if not all([car_plate, model, year, vin, owner_type]):
         return jsonify({"status": "error", "message": "Missing required fields"}), 400
 
-    if not re.match(r"^[A-Z0-9]{4,8}$", car_plate):
+    if not _PLATE_RE.match(car_plate):
         return jsonify({"status": "error", "message": "Invalid license plate format (4-8 alphanumeric characters)"}), 400
 
     try:
         year = int(year)
-        current_year = datetime.now().year
+        current_year = now.year
         if year < 1900 or year > current_year:
             return jsonify({"status": "error", "message": f"Year must be between 1900 and {current_year}"}), 400
     except ValueError:
@@ -56,13 +137,13 @@ def add_car():
 
     if next_oil_change:
         try:
-            next_oil_change = datetime.strptime(next_oil_change, "%Y-%m-%d").date()
+            next_oil_change = date.fromisoformat(next_oil_change)
         except ValueError:
             return jsonify({"status": "error", "message": "Invalid date format for next oil change (YYYY-MM-DD)"}), 400
 
     if last_service_date:
         try:
-            last_service_date = datetime.strptime(last_service_date, "%Y-%m-%d").date()
+            last_service_date = date.fromisoformat(last_service_date)
         except ValueError:
             return jsonify({"status": "error", "message": "Invalid date format for last service date (YYYY-MM-DD)"}), 400
 
@@ -76,43 +157,46 @@ def add_car():
     conn = None
     cursor = None
     try:
-        conn = get_connection()
+        conn = _get_db_connection()
         cursor = conn.cursor()
 
-        # Check if car already exists
-        cursor.execute("SELECT Car_plate FROM car WHERE Car_plate = %s", (car_plate,))
-        if cursor.fetchone():
+        # Check plate and VIN uniqueness in a single round-trip
+        cursor.execute("SELECT Car_plate, VIN FROM car WHERE Car_plate = %s OR VIN = %s", (car_plate, vin))
+        existing_cars = cursor.fetchall()
+        if any(row[0] == car_plate for row in existing_cars):
             return jsonify({"status": "error", "message": "Car with this plate already exists"}), 409
-
-        # Check if VIN already exists
-        cursor.execute("SELECT Car_plate FROM car WHERE VIN = %s", (vin,))
-        existing_vin = cursor.fetchone()
-        if existing_vin:
-            return jsonify({"status": "error", "message": f"VIN number already exists for car plate: {existing_vin[0]}"}), 409
+        if existing_cars:
+            return jsonify({"status": "error", "message": f"VIN number already exists for car plate: {existing_cars[0][0]}"}), 409
 
         # Owner Handling
-        owner_id = None
-        
         if owner_type == "existing":
             if not owner_phone:
                 return jsonify({"status": "error", "message": "Phone number required for existing owner"}), 400
-                
-            cursor.execute("SELECT Owner_ID FROM owner WHERE PhoneNUMB = %s", (owner_phone,))
-            result = cursor.fetchone()
-            if not result:
-                return jsonify({"status": "error", "message": "Owner with this phone number not found"}), 404
-            owner_id = result[0]
-
         elif owner_type == "new":
             if not all([owner_name, owner_phone]):
                 return jsonify({"status": "error", "message": "New owner name and phone number required"}), 400
-                
-            # Check if owner already exists with this phone
+        else:
+            return jsonify({"status": "error", "message": "Invalid owner type"}), 400
+
+        car_values = (car_plate, model, year, vin, next_oil_change or None)
+
+        # A cached Owner_ID is only used if that owner still exists with this phone;
+        # otherwise the insert matches no row and we fall back to the lookup
+        owner_id = _OWNER_ID_CACHE.get(owner_phone)
+        if owner_id is not None:
+            cursor.execute(_INSERT_CAR_FOR_OWNER_SQL, car_values + (owner_id, owner_phone))
+            if cursor.rowcount != 1:
+                _OWNER_ID_CACHE.pop(owner_phone)
+                owner_id = None
+
+        if owner_id is None:
             cursor.execute("SELECT Owner_ID FROM owner WHERE PhoneNUMB = %s", (owner_phone,))
             result = cursor.fetchone()
-            
+
             if result:
                 owner_id = result[0]
+            elif owner_type == "existing":
+                return jsonify({"status": "error", "message": "Owner with this phone number not found"}), 404
             else:
                 # Create new owner
                 cursor.execute(
@@ -120,14 +204,12 @@ def add_car():
                     (owner_name, owner_email or None, owner_phone)
                 )
                 owner_id = cursor.lastrowid
-        else:
-            return jsonify({"status": "error", "message": "Invalid owner type"}), 400
 
-        # Insert Car
-        cursor.execute("""
-            INSERT INTO car (Car_plate, Model, Year, VIN, Next_Oil_Change, Owner_ID)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (car_plate, model, year, vin, next_oil_change or None, owner_id))
+            # Insert Car
+            cursor.execute("""
+                INSERT INTO car (Car_plate, Model, Year, VIN, Next_Oil_Change, Owner_ID)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, car_values + (owner_id,))
 
         # Create initial service history with the new fields
         # ✅ CORRECT - no History_ID
@@ -135,16 +217,19 @@ def add_car():
         INSERT INTO service_history 
          (Service_Date, Mileage, Last_Oil_Change, Notes, Car_plate)
           VALUES (%s, %s, %s, %s, %s)
-           """, (datetime.now().date(), current_mileage, datetime.now().date(), service_notes, car_plate))
+           """, (today, current_mileage, today, service_notes, car_plate))
 
         conn.commit()
+        # Only cache the owner once the transaction that may have created it is committed
+        _OWNER_ID_CACHE.set(owner_phone, owner_id)
         
-        # Clear the plate from session after successful car addition
-        if 'detected_plate' in session:
-            session.pop('detected_plate')
-            session.modified = True
+        # Clear the plate from session after successful car addition, once the response is built
+        @after_this_request
+        def clear_detected_plate(response):
+            session.pop('detected_plate', None)
+            return response
         
-        logging.info(f"Car added successfully: {car_plate} for owner {owner_id}")
+        logger.info("Car added successfully: %s for owner %s", car_plate, owner_id)
         return jsonify({
             "status": "success", 
             "message": "Car added successfully", 
@@ -153,106 +238,80 @@ def add_car():
         }), 201
 
     except Exception as err:
-        logging.error(f"Add car failed: {err}")
+        logger.error("Add car failed: %s", err)
         if conn:
             conn.rollback()
         return jsonify({"status": "error", "message": f"Database error: {str(err)}"}), 500
     finally:
-        _safe_close(cursor, conn)
+        _safe_close(cursor)
 
 @car_bp.route('/check/<car_plate>', methods=['GET'])
 def check_car_exists(car_plate):
     """Check if car exists in database"""
-    logging.info(f"🔍 Checking car plate: {car_plate}")
+    logger.info("🔍 Checking car plate: %s", car_plate)
+    plate = car_plate.upper()
     
-    if not car_plate or not re.match(r"^[A-Z0-9]{4,8}$", car_plate.upper()):
-        logging.warning(f"Invalid plate format: {car_plate}")
+    if not plate or not _PLATE_RE.match(plate):
+        logger.warning("Invalid plate format: %s", car_plate)
         return jsonify({
             'exists': False,
             'message': 'Invalid plate format'
         })
         
+    cached = _CAR_CHECK_CACHE.get(plate)
+    if cached is not None:
+        return jsonify(cached)
+        
     conn = None
     cursor = None
     try:
-        conn = get_connection()
+        conn = _get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        logging.info(f"Executing database query for plate: {car_plate.upper()}")
+        logger.info("Executing database query for plate: %s", plate)
         
-        # Query to get comprehensive car info
-        cursor.execute("""
-            SELECT 
-                c.Car_plate,
-                c.Model,
-                c.Year,
-                c.VIN,
-                c.Next_Oil_Change,
-                o.Owner_ID,
-                o.Owner_Name,
-                o.Owner_Email,
-                o.PhoneNUMB
-            FROM car c 
-            LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID 
-            WHERE c.Car_plate = %s
-        """, (car_plate.upper(),))
+        # Car, owner and latest service history in a single round-trip
+        cursor.execute(_CAR_WITH_LATEST_SERVICE_SQL, (plate,))
         
         car = cursor.fetchone()
-        logging.info(f"Database result: {car}")
+        logger.info("Database result: %s", car)
         
         if car:
-            # Get latest service history
-            cursor.execute("""
-                SELECT Service_Date, Mileage, Last_Oil_Change, Notes 
-                FROM service_history 
-                WHERE Car_plate = %s 
-                ORDER BY History_ID DESC 
-                LIMIT 1
-            """, (car_plate.upper(),))
-            
-            service_info = cursor.fetchone()
-            if service_info:
-                car.update(service_info)
-            
-            logging.info(f"✅ Car found: {car_plate}")
-            return jsonify({
+            logger.info("✅ Car found: %s", car_plate)
+            payload = {
                 'exists': True,
                 'car': car,
                 'message': 'Car found in database'
-            })
+            }
+            _CAR_CHECK_CACHE.set(plate, payload)
+            return jsonify(payload)
         else:
-            logging.info(f"❌ Car not found: {car_plate}")
+            logger.info("❌ Car not found: %s", car_plate)
             return jsonify({
                 'exists': False,
                 'message': f'Car with plate {car_plate} not found in database'
             })
             
     except Exception as e:
-        logging.error(f"🚨 Check car exists error: {e}")
+        logger.error("🚨 Check car exists error: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Database error: {str(e)}'
         }), 500
     finally:
-        _safe_close(cursor, conn)
+        _safe_close(cursor)
 
 @car_bp.route('/detect', methods=['POST'])
 def detect_plate():
     """Simulate license plate detection"""
     try:
         # For demo purposes - simulate plate detection
-        import random
-        
-        # Sample plates from your database for realistic testing
-        detected_plates = ['R123456', 'ABC123', 'XYZ789', 'S222', 'A1111', 'W123456']
-        distances = ['2-4 meters', '4-7 meters', '7-10 meters', '10-15 meters']
-        
         # Use plates that exist in your database
-        plate_number = random.choice(detected_plates)
+        plate_number = random.choice(_DETECTED_PLATES)
         confidence = round(random.uniform(0.85, 0.98), 2)
-        distance = random.choice(distances)
+        distance = random.choice(_DISTANCES)
         
-        logging.info(f"Plate detection simulated: {plate_number}")
+        logger.info("Plate detection simulated: %s", plate_number)
         
         return jsonify({
             'success': True,
@@ -263,7 +322,7 @@ def detect_plate():
         })
         
     except Exception as e:
-        logging.error(f"Plate detection error: {e}")
+        logger.error("Plate detection error: %s", e)
         return jsonify({
             'success': False,
             'message': f'Detection error: {str(e)}'
@@ -271,34 +330,58 @@ def detect_plate():
 
 @car_bp.route('/cars', methods=['GET'])
 def get_all_cars():
-    """Get all cars"""
+    """Get all cars (optionally paginated with ?limit=&offset=), streamed row by row"""
+    limit = request.args.get('limit', type=int)
+    offset = max(request.args.get('offset', default=0, type=int), 0)
+
+    query = '''
+        SELECT 
+            c.Car_plate as plate_number,
+            c.Model as model,
+            c.Year as year,
+            c.VIN as vin,
+            c.Next_Oil_Change as next_oil_change,
+            o.Owner_Name as owner_name,
+            o.Owner_Email as owner_email,
+            o.PhoneNUMB as owner_phone
+        FROM car c
+        LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
+        ORDER BY c.Car_plate
+    '''
+    params = ()
+    if limit is not None:
+        query += " LIMIT %s OFFSET %s"
+        params = (max(limit, 0), offset)
+
+    conn = None
+    cursor = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute('''
-            SELECT 
-                c.Car_plate as plate_number,
-                c.Model as model,
-                c.Year as year,
-                c.VIN as vin,
-                c.Next_Oil_Change as next_oil_change,
-                o.Owner_Name as owner_name,
-                o.Owner_Email as owner_email,
-                o.PhoneNUMB as owner_phone
-            FROM car c
-            LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
-            ORDER BY c.Car_plate
-        ''')
-        
-        cars = cursor.fetchall()
-        return jsonify({"success": True, "cars": cars, "count": len(cars)})
-        
+        conn = _get_db_connection()
+        # Unbuffered cursor: rows are pulled from the server as they are serialized
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params)
     except Exception as e:
-        logging.error(f"Get cars error: {e}")
+        _safe_close(cursor)
+        logger.error("Get cars error: %s", e)
         return jsonify({"success": False, "message": "Failed to fetch cars"}), 500
-    finally:
-        _safe_close(cursor, conn)
+
+    def generate():
+        count = 0
+        try:
+            yield '{"success": true, "cars": ['
+            for car in cursor:
+                if count:
+                    yield ','
+                yield current_app.json.dumps(car)
+                count += 1
+            yield f'], "count": {count}}}'
+        except Exception as e:
+            logger.error("Get cars streaming error after %s rows: %s", count, e)
+            raise
+        finally:
+            _safe_close(cursor)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 # Session-based plate storage routes
 @car_bp.route('/store-plate', methods=['POST'])
@@ -308,10 +391,10 @@ def store_plate():
         data = request.get_json()
         plate = data.get('plate', '').strip().upper()
         
-        if plate and re.match(r"^[A-Z0-9]{4,8}$", plate):
+        if plate and _PLATE_RE.match(plate):
             session['detected_plate'] = plate
             session.modified = True
-            logging.info(f"Plate stored in session: {plate}")
+            logger.info("Plate stored in session: %s", plate)
             return jsonify({
                 'status': 'success', 
                 'message': 'Plate stored successfully',
@@ -324,7 +407,7 @@ def store_plate():
             }), 400
             
     except Exception as e:
-        logging.error(f"Store plate error: {e}")
+        logger.error("Store plate error: %s", e)
         return jsonify({
             'status': 'error', 
             'message': f'Storage error: {str(e)}'
@@ -333,22 +416,16 @@ def store_plate():
 @car_bp.route('/clear-plate', methods=['POST'])
 def clear_plate():
     """Clear plate from session"""
-    try:
-        plate = session.pop('detected_plate', None)
-        session.modified = True
-        return jsonify({
-            'status': 'success', 
-            'message': 'Plate cleared from session',
-            'cleared_plate': plate
-        })
-    except Exception as e:
-        logging.error(f"Clear plate error: {e}")
-        return jsonify({
-            'status': 'error', 
-            'message': f'Clear error: {str(e)}'
-        }), 500
+    # SecureCookieSession.pop marks the session modified itself
+    plate = session.pop('detected_plate', None)
+    return jsonify({
+        'status': 'success', 
+        'message': 'Plate cleared from session',
+        'cleared_plate': plate
+    })
 
 @car_bp.route('/stored-plate', methods=['GET'])
+@session_read_only
 def get_stored_plate():
     """Get the plate stored in session"""
     try:
@@ -359,7 +436,7 @@ def get_stored_plate():
             'has_plate': bool(plate)
         })
     except Exception as e:
-        logging.error(f"Get stored plate error: {e}")
+        logger.error("Get stored plate error: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Failed to get stored plate: {str(e)}'
@@ -367,6 +444,7 @@ def get_stored_plate():
 
 # Template routes
 @car_bp.route('/service-menu')
+@session_read_only
 def service_menu():
     """Serve the service menu page"""
     # Only use session, no URL parameters
@@ -374,6 +452,7 @@ def service_menu():
     return render_template('service_menu.html', plate=plate)
 
 @car_bp.route('/appointment')
+@session_read_only
 def appointment_page():
     """Serve the appointment booking page"""
     # Only use session, no URL parameters
@@ -381,6 +460,7 @@ def appointment_page():
     return render_template('appointment.html', plate=plate)
 
 @car_bp.route('/service-history')
+@session_read_only
 def service_history_page():
     """Serve the service history page"""
     # Only use session, no URL parameters
@@ -388,16 +468,18 @@ def service_history_page():
     return render_template('service_history.html', plate=plate)
 
 @car_bp.route('/license-detection')
+@session_read_only
 def license_detection_page():
     """Serve the license detection page"""
     return render_template('license_dection.html')
 
 @car_bp.route('/addCar')
+@session_read_only
 def add_car_form():
     """Serve the add car form with pre-filled plate from session ONLY"""
     # CRITICAL: Only use session, ignore any URL parameters
     plate = session.get('detected_plate', '')
-    logging.info(f"Add car form requested. Session plate: {plate}")
+    logger.info("Add car form requested. Session plate: %s", plate)
     
     # Render template with session plate only (no owners list)
     return render_template('addCar.html', pre_filled_plate=plate)
@@ -408,13 +490,15 @@ def car_dashboard():
     return render_template('car_dashboard.html')
 
 @car_bp.route('/after_service_form.html')
+@session_read_only
 def after_service_form():
     """Serve the after service form page"""
     plate = session.get('detected_plate', '')
-    logging.info(f"After service form requested. Session plate: {plate}")
+    logger.info("After service form requested. Session plate: %s", plate)
     return render_template('after_service_form.html', plate=plate)
 
 @car_bp.route('/check-session-plate', methods=['GET'])
+@session_read_only
 def check_session_plate():
     """Check if there's a plate in session and return its status"""
     try:
@@ -428,7 +512,7 @@ def check_session_plate():
             'message': 'Session plate check completed'
         })
     except Exception as e:
-        logging.error(f"Check session plate error: {e}")
+        logger.error("Check session plate error: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Failed to check session plate: {str(e)}'
@@ -438,74 +522,46 @@ def check_session_plate():
 @car_bp.route('/api/car/<car_plate>', methods=['GET'])
 def get_car_info_api(car_plate):
     """Get car information by plate number for after-service form"""
+    conn = None
+    cursor = None
     try:
         # Validate plate format
-        if not car_plate or not re.match(r"^[A-Z0-9]{4,8}$", car_plate.upper()):
+        plate = car_plate.upper()
+        if not plate or not _PLATE_RE.match(plate):
             return jsonify({
                 'status': 'error',
                 'message': 'Invalid license plate format'
             }), 400
 
-        conn = get_connection()
+        conn = _get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Get car information with owner details
-        cursor.execute("""
-            SELECT 
-                c.Car_plate,
-                c.Model,
-                c.Year,
-                c.VIN,
-                c.Next_Oil_Change,
-                o.Owner_ID,
-                o.Owner_Name,
-                o.Owner_Email,
-                o.PhoneNUMB
-            FROM car c 
-            LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID 
-            WHERE c.Car_plate = %s
-        """, (car_plate.upper(),))
+        # Get car information with owner details and latest service history
+        cursor.execute(_CAR_WITH_LATEST_SERVICE_SQL, (plate,))
         
         car = cursor.fetchone()
         
         if car:
-            # Get latest service history
-            cursor.execute("""
-                SELECT 
-                    Service_Date, 
-                    Mileage, 
-                    Last_Oil_Change, 
-                    Notes 
-                FROM service_history 
-                WHERE Car_plate = %s 
-                ORDER BY History_ID DESC 
-                LIMIT 1
-            """, (car_plate.upper(),))
-            
-            service_info = cursor.fetchone()
-            if service_info:
-                car.update(service_info)
-            
-            logging.info(f"✅ Car info fetched for: {car_plate}")
+            logger.info("✅ Car info fetched for: %s", car_plate)
             return jsonify({
                 'status': 'success',
                 'data': car
             })
         else:
-            logging.info(f"❌ Car not found: {car_plate}")
+            logger.info("❌ Car not found: %s", car_plate)
             return jsonify({
                 'status': 'error',
                 'message': 'Car not found in database'
             }), 404
             
     except Exception as e:
-        logging.error(f"Get car info API error: {e}")
+        logger.error("Get car info API error: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'Database error'
         }), 500
     finally:
-        _safe_close(cursor, conn)
+        _safe_close(cursor)
 
 @car_bp.route('/api/update-car-service', methods=['POST'])
 def update_car_service():
@@ -526,18 +582,21 @@ def update_car_service():
         next_oil_change = data.get('next_oil_change')
         notes = data.get('notes', '').strip()
         services_performed = data.get('services_performed', [])
+
+        now = datetime.now()
+        today = now.date()
         
         # Validation
         if not car_plate:
             return jsonify({'status': 'error', 'message': 'License plate is required'}), 400
         
-        if not re.match(r"^[A-Z0-9]{4,8}$", car_plate):
+        if not _PLATE_RE.match(car_plate):
             return jsonify({'status': 'error', 'message': 'Invalid license plate format'}), 400
         
         if year:
             try:
                 year = int(year)
-                current_year = datetime.now().year
+                current_year = now.year
                 if year < 1900 or year > current_year:
                     return jsonify({'status': 'error', 'message': f'Year must be between 1900 and {current_year}'}), 400
             except (ValueError, TypeError):
@@ -555,12 +614,10 @@ def update_car_service():
                 return jsonify({'status': 'error', 'message': 'Invalid mileage format'}), 400
         
         # Date validation
-        today = datetime.now().date()
-        
         # Service date validation
         if service_date:
             try:
-                service_date = datetime.strptime(service_date, "%Y-%m-%d").date()
+                service_date = date.fromisoformat(service_date)
                 if service_date > today:
                     return jsonify({'status': 'error', 'message': 'Service date cannot be in the future'}), 400
             except ValueError:
@@ -571,34 +628,37 @@ def update_car_service():
         conn = None
         cursor = None
         try:
-            conn = get_connection()
+            conn = _get_db_connection()
             cursor = conn.cursor()
             
             # Start transaction
             conn.start_transaction()
             
-            # Check if car exists
-            cursor.execute("SELECT Car_plate FROM car WHERE Car_plate = %s", (car_plate,))
-            if not cursor.fetchone():
-                return jsonify({'status': 'error', 'message': 'Car not found in database'}), 404
-            
-            # 🔥 AUTOMATICALLY GET LAST OIL CHANGE FROM DATABASE
+            # Check if car exists and 🔥 AUTOMATICALLY GET LAST OIL CHANGE in one query
             cursor.execute("""
-                SELECT Last_Oil_Change 
-                FROM service_history 
-                WHERE Car_plate = %s 
-                ORDER BY History_ID DESC 
-                LIMIT 1
+                SELECT c.Car_plate, sh.Last_Oil_Change
+                FROM car c
+                LEFT JOIN service_history sh ON sh.History_ID = (
+                    SELECT History_ID
+                    FROM service_history
+                    WHERE Car_plate = c.Car_plate
+                    ORDER BY History_ID DESC
+                    LIMIT 1
+                )
+                WHERE c.Car_plate = %s
             """, (car_plate,))
             
             result = cursor.fetchone()
-            if result and result[0]:
-                last_oil_change = result[0]
-                logging.info(f"🔍 Auto-fetched last oil change from DB: {last_oil_change}")
+            if not result:
+                return jsonify({'status': 'error', 'message': 'Car not found in database'}), 404
+            
+            if result[1]:
+                last_oil_change = result[1]
+                logger.info("🔍 Auto-fetched last oil change from DB: %s", last_oil_change)
             else:
                 # No history found, use service date
                 last_oil_change = service_date
-                logging.info(f"📝 No oil change history found, using service date: {last_oil_change}")
+                logger.info("📝 No oil change history found, using service date: %s", last_oil_change)
             
             # Additional time validations
             if last_oil_change > service_date:
@@ -608,42 +668,24 @@ def update_car_service():
             auto_calculated = False
             if not next_oil_change:
                 # Calculate 6 months from last oil change date
-                next_oil_change_date = last_oil_change
                 months_to_add = 6
                 
-                # Handle month overflow
-                new_month = next_oil_change_date.month + months_to_add
-                new_year = next_oil_change_date.year
-                
-                while new_month > 12:
-                    new_month -= 12
-                    new_year += 1
-                
-                # Handle day adjustment for months with fewer days
-                try:
-                    next_oil_change_date = next_oil_change_date.replace(year=new_year, month=new_month)
-                except ValueError:
-                    # If day is invalid for target month (e.g., Feb 30), go to last day of month
-                    if new_month == 2:
-                        # Check for leap year
-                        if (new_year % 4 == 0 and new_year % 100 != 0) or (new_year % 400 == 0):
-                            last_day = 29
-                        else:
-                            last_day = 28
-                        next_oil_change_date = next_oil_change_date.replace(year=new_year, month=new_month, day=last_day)
-                    else:
-                        # For other months, use the original day or last day of month
-                        import calendar
-                        last_day = calendar.monthrange(new_year, new_month)[1]
-                        next_oil_change_date = next_oil_change_date.replace(year=new_year, month=new_month, day=min(next_oil_change_date.day, last_day))
+                # Handle month overflow and clamp the day to the target month's length (e.g., Feb 30)
+                month_index = last_oil_change.month - 1 + months_to_add
+                new_year = last_oil_change.year + month_index // 12
+                new_month = month_index % 12 + 1
+                last_day = calendar.monthrange(new_year, new_month)[1]
+                next_oil_change_date = last_oil_change.replace(
+                    year=new_year, month=new_month, day=min(last_oil_change.day, last_day)
+                )
                 
                 next_oil_change = next_oil_change_date.strftime("%Y-%m-%d")
                 auto_calculated = True
-                logging.info(f"📅 Auto-calculated next oil change: {next_oil_change}")
+                logger.info("📅 Auto-calculated next oil change: %s", next_oil_change)
             else:
                 # Validate provided next oil change date
                 try:
-                    next_oil_change_date = datetime.strptime(next_oil_change, "%Y-%m-%d").date()
+                    next_oil_change_date = date.fromisoformat(next_oil_change)
                     if next_oil_change_date <= today:
                         return jsonify({'status': 'error', 'message': 'Next oil change date must be in the future'}), 400
                 except ValueError:
@@ -658,37 +700,18 @@ def update_car_service():
                     return jsonify({'status': 'error', 'message': f'VIN already exists for car: {existing_vin[0]}'}), 409
             
             # Validate service IDs
-            valid_service_ids = {1, 2, 3, 4, 5}  # Based on your service table
-            if services_performed:
-                invalid_services = [s for s in services_performed if int(s) not in valid_service_ids]
-                if invalid_services:
-                    return jsonify({'status': 'error', 'message': f'Invalid service IDs: {invalid_services}'}), 400
-            
-            # Update car information
-            update_fields = []
-            update_values = []
-            
-            if model:
-                update_fields.append("Model = %s")
-                update_values.append(model)
-            if year:
-                update_fields.append("Year = %s")
-                update_values.append(year)
-            if vin:
-                update_fields.append("VIN = %s")
-                update_values.append(vin)
+            requested_services = {int(s) for s in services_performed}
+            invalid_services = requested_services - _VALID_SERVICE_IDS
+            if invalid_services:
+                return jsonify({'status': 'error', 'message': f'Invalid service IDs: {sorted(invalid_services)}'}), 400
             
+            # Update car information - optional fields pick one of the precomputed statements
+            optional_values = (model, year, vin)
+            mask = sum(1 << bit for bit, value in enumerate(optional_values) if value)
+            update_values = [value for value in optional_values if value]
             # Always update next oil change (auto-calculated or provided)
-            update_fields.append("Next_Oil_Change = %s")
-            update_values.append(next_oil_change)
-            
-            if update_fields:
-                update_values.append(car_plate)
-                cursor.execute(f"""
-                    UPDATE car 
-                    SET {', '.join(update_fields)}
-                    WHERE Car_plate = %s
-                """, update_values)
+            update_values += [next_oil_change, car_plate]
+            cursor.execute(_CAR_UPDATE_SQL[mask], update_values)
             
             # 🔥 FIX: Let MySQL handle the auto-increment by NOT specifying History_ID
             # Create service history record WITHOUT History_ID (let DB auto-increment)
@@ -707,20 +730,19 @@ def update_car_service():
             # Get the auto-generated History_ID
             history_id = cursor.lastrowid
             
-            # Link services performed (if any)
-            if services_performed:
-                for service_id in services_performed:
-                    cursor.execute("""
-                        INSERT INTO service_history_service 
-                        (History_ID, Service_ID)
-                        VALUES (%s, %s)
-                    """, (history_id, int(service_id)))
+            # Link services performed (if any); the connector batches this into one multi-row INSERT
+            if requested_services:
+                cursor.executemany("""
+                    INSERT INTO service_history_service 
+                    (History_ID, Service_ID)
+                    VALUES (%s, %s)
+                """, [(history_id, service_id) for service_id in sorted(requested_services)])
             
             conn.commit()
             
-            logging.info(f"✅ Car service updated for: {car_plate}, History ID: {history_id}")
-            logging.info(f"📅 Last oil change: {last_oil_change}")
-            logging.info(f"📅 Next oil change: {next_oil_change} (auto-calculated: {auto_calculated})")
+            logger.info("✅ Car service updated for: %s, History ID: %s", car_plate, history_id)
+            logger.info("📅 Last oil change: %s", last_oil_change)
+            logger.info("📅 Next oil change: %s (auto-calculated: %s)", next_oil_change, auto_calculated)
             
             return jsonify({
                 'status': 'success',
@@ -735,16 +757,16 @@ def update_car_service():
         except Exception as e:
             if conn:
                 conn.rollback()
-            logging.error(f"Update car service error: {e}")
+            logger.error("Update car service error: %s", e)
             return jsonify({
                 'status': 'error',
                 'message': f'Database error: {str(e)}'
             }), 500
         finally:
-            _safe_close(cursor, conn)
+            _safe_close(cursor)
             
     except Exception as e:
-        logging.error(f"Update car service error: {e}")
+        logger.error("Update car service error: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Server error: {str(e)}'
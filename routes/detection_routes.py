@@ -1,7 +1,12 @@
 import io
+import json
 import logging
+import os
+import queue
 import re
-from flask import Blueprint, request, jsonify, session, render_template
+import threading
+import time
+from flask import Blueprint, Response, request, jsonify, session, render_template, after_this_request
 import numpy as np
 import cv2
 
@@ -11,14 +16,127 @@ logging.basicConfig(level=logging.INFO)
 detection_bp = Blueprint("detection", __name__, template_folder="../templates", static_folder="../static")
 
 # ------------------------
-# YOLOv8 License Plate Model
+# Torch precision (Tensor Cores on CUDA, FP32 elsewhere; FP16 only for YOLO)
 # ------------------------
 try:
+    import torch
+    torch.set_float32_matmul_precision('high')
+    USE_HALF = torch.cuda.is_available()
+except ImportError:
+    torch = None
+    USE_HALF = False
+
+# ------------------------
+# YOLOv8 License Plate Model
+# ------------------------
+YOLO_WEIGHTS_PATH = "models/best.pt"  # Your trained Lebanese plate model
+YOLO_ENGINE_PATH = "models/best.engine"  # TensorRT export of the same model
+YOLO_IMGSZ = 640
+YOLO_MIN_CONF = 0.05  # Lowest box confidence still considered for OCR
+YOLO_MAX_INPUT_SIDE = 1280  # Larger uploads are downscaled before YOLO
+
+
+def _export_tensorrt_engine(YOLO):
+    """Export the plate model to a TensorRT engine (FP16, or INT8 with calibration data)"""
+    export_args = dict(format="engine", imgsz=YOLO_IMGSZ, half=True, dynamic=True, batch=8, workspace=4)
+    int8_data = os.getenv("YOLO_INT8_CALIBRATION_DATA")
+    if int8_data:
+        export_args.update(int8=True, data=int8_data)
+    YOLO(YOLO_WEIGHTS_PATH).export(**export_args)
+    logger.info("✅ Exported TensorRT plate engine (%s)", "INT8" if int8_data else "FP16")
+
+
+def _load_yolo_model():
+    """Load the plate model, preferring the TensorRT engine over the PyTorch checkpoint"""
     from ultralytics import YOLO
-    yolo_model = YOLO("models/best.pt")  # Your trained Lebanese plate model
+
+    # Building an engine takes minutes, so only do it when explicitly requested
+    if not os.path.exists(YOLO_ENGINE_PATH) and os.getenv("YOLO_EXPORT_TENSORRT") == "1":
+        try:
+            _export_tensorrt_engine(YOLO)
+        except Exception as e:
+            logger.warning("TensorRT export failed, using PyTorch weights: %s", e)
+
+    if os.path.exists(YOLO_ENGINE_PATH):
+        try:
+            model = YOLO(YOLO_ENGINE_PATH, task="detect")
+            logger.info("✅ TensorRT plate engine loaded: %s", YOLO_ENGINE_PATH)
+            return model
+        except Exception as e:
+            logger.warning("TensorRT engine failed to load, using PyTorch weights: %s", e)
+
+    model = YOLO(YOLO_WEIGHTS_PATH)
     logger.info("✅ Custom-trained Lebanese plate model loaded (96.2% mAP50)")
+    return model
+
+
+class YoloBatcher:
+    """Groups concurrent /detect requests into batched YOLO predict calls.
+
+    Requests are queued and a single daemon thread drains up to
+    ``max_batch_size`` images (waiting at most ``batch_timeout`` seconds
+    for the batch to fill), runs one predict over the whole batch and hands
+    each result back to its waiting request. Every caller passes
+    ``YOLO_MIN_CONF``; items with a different ``conf`` would get a predict
+    of their own.
+    """
+
+    def __init__(self, model, max_batch_size=8, batch_timeout=0.05):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="yolo-batcher", daemon=True)
+        self._thread.start()
+
+    def predict(self, img, conf, timeout=5.0):
+        """Run YOLO on one image through the shared batch; returns its Results object"""
+        item = {"img": img, "conf": conf, "event": threading.Event()}
+        self._queue.put(item)
+        if not item["event"].wait(timeout):
+            raise TimeoutError(f"YOLO inference timed out after {timeout}s")
+        if "error" in item:
+            raise item["error"]
+        return item["result"]
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            by_conf = {}
+            for item in self._next_batch():
+                by_conf.setdefault(item["conf"], []).append(item)
+
+            for conf, items in by_conf.items():
+                try:
+                    results = self.model.predict([item["img"] for item in items], verbose=False, conf=conf, half=USE_HALF, imgsz=YOLO_IMGSZ)
+                    for item, result in zip(items, results):
+                        item["result"] = result
+                except Exception as e:
+                    for item in items:
+                        item["error"] = e
+                finally:
+                    for item in items:
+                        item["event"].set()
+
+
+try:
+    yolo_model = _load_yolo_model()
+    yolo_batcher = YoloBatcher(yolo_model)
 except Exception as e:
     yolo_model = None
+    yolo_batcher = None
     logger.warning("YOLOv8 not available: %s", e)
 
 # ------------------------
@@ -32,22 +150,266 @@ except Exception as e:
     ocr_reader = None
     logger.warning("EasyOCR not available: %s", e)
 
+OCR_RECOGNIZER_ONNX_PATH = "models/recognizer.onnx"  # ONNX export of EasyOCR's recognizer
+ORT_PROVIDERS = ("TensorrtExecutionProvider", "CUDAExecutionProvider", "CPUExecutionProvider")
+
+
+class OnnxRecognizer:
+    """Drop-in for EasyOCR's recognizer module that runs the exported graph in ONNX Runtime.
+
+    EasyOCR only calls ``eval()`` and ``model(image, text)`` on its
+    recognizer and expects a torch tensor of logits back, so the detector,
+    resizing and CTC decoding stay EasyOCR's own.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, image, text=None):
+        logits = self.session.run(None, {self.input_name: image.detach().cpu().float().numpy()})[0]
+        return torch.from_numpy(logits).to(image.device)
+
+
+def _export_recognizer_onnx(reader):
+    """Export EasyOCR's recognizer with dynamic batch and width axes"""
+    model = getattr(reader.recognizer, "module", reader.recognizer)  # unwrap DataParallel
+    model.eval()
+
+    class _ImageOnly(torch.nn.Module):
+        def __init__(self, recognizer):
+            super().__init__()
+            self.recognizer = recognizer
+
+        def forward(self, image):
+            return self.recognizer(image, None)
+
+    device = next(model.parameters()).device
+    dummy = torch.zeros(1, 1, 64, 256, device=device)
+    torch.onnx.export(
+        _ImageOnly(model), dummy, OCR_RECOGNIZER_ONNX_PATH,
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch", 3: "width"}, "logits": {0: "batch", 1: "steps"}},
+        opset_version=17
+    )
+    logger.info("✅ Exported EasyOCR recognizer to ONNX: %s", OCR_RECOGNIZER_ONNX_PATH)
+
+
+def _use_onnx_recognizer(reader):
+    """Swap the reader's recognizer for ONNX Runtime when an export is available"""
+    if not os.path.exists(OCR_RECOGNIZER_ONNX_PATH) and os.getenv("OCR_EXPORT_ONNX") == "1":
+        _export_recognizer_onnx(reader)
+    if not os.path.exists(OCR_RECOGNIZER_ONNX_PATH):
+        return
+
+    import onnxruntime as ort
+    available = set(ort.get_available_providers())
+    providers = [p for p in ORT_PROVIDERS if p in available]
+    session = ort.InferenceSession(OCR_RECOGNIZER_ONNX_PATH, providers=providers)
+    reader.recognizer = OnnxRecognizer(session)
+    logger.info("✅ EasyOCR recognizer running on ONNX Runtime (%s)", session.get_providers()[0])
+
+
+if ocr_reader is not None:
+    try:
+        _use_onnx_recognizer(ocr_reader)
+    except Exception as e:
+        logger.warning("ONNX recognizer not available, using PyTorch: %s", e)
+
+# ------------------------
+# Image decoding (libjpeg-turbo when available)
+# ------------------------
+JPEG_MAGIC = b'\xff\xd8\xff'
+EXIF_MARKER = b'Exif\x00\x00'
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+    logger.info("✅ libjpeg-turbo decoder loaded")
+except Exception as e:
+    turbo_jpeg = None
+    logger.info("PyTurboJPEG not available, decoding with OpenCV: %s", e)
+
+
+def decode_image(img_bytes):
+    """Decode uploaded image bytes to a BGR array, or None if unreadable"""
+    # cv2.imdecode applies EXIF orientation and TurboJPEG does not, so only
+    # hand it JPEGs without an EXIF block
+    if turbo_jpeg is not None and img_bytes[:3] == JPEG_MAGIC and EXIF_MARKER not in img_bytes[:65536]:
+        try:
+            return turbo_jpeg.decode(img_bytes, pixel_format=TJPF_BGR)
+        except Exception as e:
+            logger.debug("TurboJPEG decode failed, falling back to OpenCV: %s", e)
+    return cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+
 # ------------------------
 # Helper Functions for Better OCR Processing
 # ------------------------
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+
+# Use OpenCV's CUDA CLAHE when cv2 was built with CUDA and a device is present
+try:
+    USE_CUDA_CLAHE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    USE_CUDA_CLAHE = False
+
+# CLAHE objects keep internal buffers, so each worker thread gets its own
+_clahe_local = threading.local()
+
+
+def _get_clahe(cuda):
+    attr = "cuda_clahe" if cuda else "clahe"
+    clahe = getattr(_clahe_local, attr, None)
+    if clahe is None:
+        create = cv2.cuda.createCLAHE if cuda else cv2.createCLAHE
+        clahe = create(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID)
+        setattr(_clahe_local, attr, clahe)
+    return clahe
+
+
+def _preprocess_plate_image_cuda(plate_crop):
+    gpu_img = cv2.cuda_GpuMat()
+    gpu_img.upload(plate_crop)
+    if len(plate_crop.shape) == 3:
+        gpu_img = cv2.cuda.cvtColor(gpu_img, cv2.COLOR_BGR2GRAY)
+    return _get_clahe(cuda=True).apply(gpu_img, cv2.cuda.Stream_Null()).download()
+
+
 def preprocess_plate_image(plate_crop):
     """Enhance plate image for better OCR"""
+    if USE_CUDA_CLAHE:
+        try:
+            return _preprocess_plate_image_cuda(plate_crop)
+        except cv2.error as e:
+            logger.warning(f"CUDA CLAHE failed, falling back to CPU: {e}")
+    
     if len(plate_crop.shape) == 3:
         gray = cv2.cvtColor(plate_crop, cv2.COLOR_BGR2GRAY)
     else:
         gray = plate_crop
     
     # Enhance contrast using CLAHE
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    enhanced = clahe.apply(gray)
+    enhanced = _get_clahe(cuda=False).apply(gray)
     
     return enhanced
 
+OCR_ALLOWLIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+
+# readtext settings for the CLAHE-enhanced crop, and for the raw crop when that reads nothing
+OCR_ENHANCED_KWARGS = dict(allowlist=OCR_ALLOWLIST, width_ths=0.7, height_ths=0.7)
+OCR_RAW_KWARGS = dict(allowlist=OCR_ALLOWLIST, width_ths=0.5)
+
+
+def read_plates_batched(crops, **readtext_kwargs):
+    """Run EasyOCR over plate crops, batching crops that share a shape.
+
+    EasyOCR's batched detector needs uniform inputs; crops are grouped by
+    shape rather than padded or resized, so every crop is read exactly as a
+    per-crop ``readtext`` call would read it. Returns one list of
+    (bbox, text, confidence) per crop, in input order; a failing group gets
+    empty results.
+    """
+    groups = {}
+    for i, crop in enumerate(crops):
+        groups.setdefault(crop.shape, []).append(i)
+
+    results = [[] for _ in crops]
+    for indices in groups.values():
+        images = [crops[i] for i in indices]
+        # No FP16 autocast here: CRAFT's score maps would come back as float16,
+        # which EasyOCR hands to cv2.threshold and OpenCV rejects
+        try:
+            if len(images) == 1:
+                group_results = [ocr_reader.readtext(images[0], **readtext_kwargs)]
+            else:
+                group_results = ocr_reader.readtext_batched(images, batch_size=len(images), **readtext_kwargs)
+        except Exception as ocr_err:
+            logger.warning(f"Batched OCR failed: {ocr_err}")
+            continue
+        for i, ocr_results in zip(indices, group_results):
+            results[i] = ocr_results
+    return results
+
+
+def _warm_up_models():
+    """Run one dummy inference so weight loading and kernel selection happen at import"""
+    if yolo_batcher is not None:
+        try:
+            yolo_batcher.predict(np.zeros((YOLO_IMGSZ, YOLO_IMGSZ, 3), np.uint8), conf=YOLO_MIN_CONF, timeout=120)
+            logger.info("✅ YOLO warmed up")
+        except Exception as e:
+            logger.warning("YOLO warm-up failed: %s", e)
+    if ocr_reader is not None:
+        read_plates_batched([np.zeros((60, 200), np.uint8)], **OCR_ENHANCED_KWARGS)
+        logger.info("✅ EasyOCR warmed up")
+
+
+_warm_up_models()
+
+
+# CHARACTER CONFUSION RULES
+# -----------------------------------------------------
+# RULE 1: FIRST CHARACTER - if confused → choose LETTER
+# Common OCR confusions for FIRST character (digit→letter)
+FIRST_CHAR_CORRECTIONS = {
+    '1': 'I',  # 1 looks like I → Choose I
+    '2': 'Z',  # 2 looks like Z → Choose Z
+    '6': 'G',  # 6 looks like G → Choose G
+    '0': 'O',  # 0 looks like O → Choose O
+    '8': 'B',  # 8 looks like B → Choose B
+    '5': 'S',  # 5 looks like S → Choose S
+    '7': 'T',  # 7 looks like T → Choose T  ← YOUR ISSUE FIXED
+    '3': 'E',  # 3 looks like E → Choose E
+    '4': 'A',  # 4 looks like A → Choose A
+    '9': 'Q',  # 9 looks like Q → Choose Q
+}
+
+# RULE 2: OTHER CHARACTERS - if confused → choose DIGIT
+# Common OCR confusions for OTHER characters (letter→digit)
+OTHER_CHARS_CORRECTIONS = {
+    'I': '1', 'L': '1',  # I/L look like 1 → Choose 1
+    'O': '0',            # O looks like 0 → Choose 0  ← YOUR ISSUE FIXED
+    'Z': '2',            # Z looks like 2 → Choose 2
+    'E': '3',            # E looks like 3 → Choose 3
+    'A': '4',            # A looks like 4 → Choose 4
+    'S': '5',            # S looks like 5 → Choose 5
+    'G': '6',            # G looks like 6 → Choose 6
+    'T': '7',            # T looks like 7 → Choose 7  ← YOUR ISSUE FIXED
+    'B': '8',            # B looks like 8 → Choose 8
+    'Q': '9',            # Q looks like 9 → Choose 9
+
+    # Additional common confusions
+    'D': '0', 'U': '0',  # D/U look like 0
+    'J': '1', 'V': '1',  # J/V look like 1
+    'Y': '7', 'X': '7',  # Y/X look like 7
+    'M': '1', 'N': '1',  # M/N look like 1
+    'H': '1', 'K': '1',  # H/K look like 1
+    'P': '9', 'R': '2',  # P→9, R→2
+    'F': '7', 'W': '7',  # F/W→7
+    'C': '0',            # C→0
+}
+
+# Compiled once: str.translate applies each rule in a single C-level pass
+FIRST_CHAR_TABLE = str.maketrans(FIRST_CHAR_CORRECTIONS)
+OTHER_CHARS_TABLE = str.maketrans(OTHER_CHARS_CORRECTIONS)
+
+_NON_ALNUM_RE = re.compile(r'[^A-Z0-9]')
+
+# VALIDATE AGAINST LEBANESE PLATE PATTERNS
+PLATE_PATTERNS = [
+    re.compile(r'^[A-Z]\d{5,7}$'),      # B123456, B203333
+    re.compile(r'^\d{5,8}$'),           # 624651, 6210290
+    re.compile(r'^[A-Z]{2}\d{4,6}$'),   # IN19981, N149881
+    re.compile(r'^[A-Z]\d{3,6}[A-Z]?$'), # 205346J, 6587904
+    re.compile(r'^\d{4,7}[A-Z]?$'),     # 220074, 587904
+]
+
+
 def clean_and_validate_plate_text(text, debug_info=""):
     """
     Clean OCR text with character confusion handling
@@ -59,7 +421,7 @@ def clean_and_validate_plate_text(text, debug_info=""):
         return None
     
     # Clean text - keep only alphanumeric, uppercase
-    clean_text = re.sub(r'[^A-Z0-9]', '', text.upper())
+    clean_text = _NON_ALNUM_RE.sub('', text.upper())
     
     if len(clean_text) < 3:
         logger.info(f"{debug_info}❌ Too short: '{clean_text}'")
@@ -67,94 +429,28 @@ def clean_and_validate_plate_text(text, debug_info=""):
     
     logger.info(f"{debug_info}Raw: '{text}' → Clean: '{clean_text}'")
     
-    # CHARACTER CONFUSION RULES
-    # -----------------------------------------------------
-    # RULE 1: FIRST CHARACTER - if confused → choose LETTER
+    # Apply first character rule (digit→letter), then other characters rule (letter→digit)
     first_char = clean_text[0]
-    
-    # Common OCR confusions for FIRST character (digit→letter)
-    first_char_corrections = {
-        '1': 'I',  # 1 looks like I → Choose I
-        '2': 'Z',  # 2 looks like Z → Choose Z
-        '6': 'G',  # 6 looks like G → Choose G
-        '0': 'O',  # 0 looks like O → Choose O
-        '8': 'B',  # 8 looks like B → Choose B
-        '5': 'S',  # 5 looks like S → Choose S
-        '7': 'T',  # 7 looks like T → Choose T  ← YOUR ISSUE FIXED
-        '3': 'E',  # 3 looks like E → Choose E
-        '4': 'A',  # 4 looks like A → Choose A
-        '9': 'Q',  # 9 looks like Q → Choose Q
-    }
-    
-    # Apply first character rule
-    if first_char in first_char_corrections:
-        corrected_first = first_char_corrections[first_char]
+    corrected_first = first_char.translate(FIRST_CHAR_TABLE)
+    if corrected_first != first_char:
         logger.info(f"{debug_info}First char '{first_char}' → '{corrected_first}' (digit→letter)")
-        clean_text = corrected_first + clean_text[1:]
-    
-    # -----------------------------------------------------
-    # RULE 2: OTHER CHARACTERS - if confused → choose DIGIT
-    remaining_chars = clean_text[1:] if len(clean_text) > 1 else ""
-    
-    # Common OCR confusions for OTHER characters (letter→digit)
-    other_chars_corrections = {
-        'I': '1', 'L': '1',  # I/L look like 1 → Choose 1
-        'O': '0', 'Q': '0',  # O/Q look like 0 → Choose 0  ← YOUR ISSUE FIXED
-        'Z': '2',            # Z looks like 2 → Choose 2
-        'E': '3',            # E looks like 3 → Choose 3
-        'A': '4',            # A looks like 4 → Choose 4
-        'S': '5',            # S looks like 5 → Choose 5
-        'G': '6',            # G looks like 6 → Choose 6
-        'T': '7',            # T looks like 7 → Choose 7  ← YOUR ISSUE FIXED
-        'B': '8',            # B looks like 8 → Choose 8
-        'Q': '9',            # Q looks like 9 → Choose 9
-        
-        # Additional common confusions
-        'D': '0', 'U': '0',  # D/U look like 0
-        'J': '1', 'V': '1',  # J/V look like 1
-        'Y': '7', 'X': '7',  # Y/X look like 7
-        'M': '1', 'N': '1',  # M/N look like 1
-        'H': '1', 'K': '1',  # H/K look like 1
-        'P': '9', 'R': '2',  # P→9, R→2
-        'F': '7', 'W': '7',  # F/W→7
-        'C': '0',            # C→0
-    }
-    
-    # Convert remaining characters
-    corrected_remaining = ""
-    for i, char in enumerate(remaining_chars):
-        if char.isdigit():
-            corrected_remaining += char  # Already digit
-        elif char in other_chars_corrections:
-            corrected_digit = other_chars_corrections[char]
-            corrected_remaining += corrected_digit
-            logger.debug(f"{debug_info}Char {i+2}: '{char}' → '{corrected_digit}'")
-        else:
-            corrected_remaining += char  # Keep as-is if unknown
     
     # Reconstruct final text
-    final_text = clean_text[0] + corrected_remaining
+    final_text = corrected_first + clean_text[1:].translate(OTHER_CHARS_TABLE)
     
     # -----------------------------------------------------
     # VALIDATE AGAINST LEBANESE PLATE PATTERNS
-    patterns = [
-        r'^[A-Z]\d{5,7}$',      # B123456, B203333
-        r'^\d{5,8}$',           # 624651, 6210290
-        r'^[A-Z]{2}\d{4,6}$',   # IN19981, N149881
-        r'^[A-Z]\d{3,6}[A-Z]?$', # 205346J, 6587904
-        r'^\d{4,7}[A-Z]?$',     # 220074, 587904
-    ]
-    
-    for pattern in patterns:
-        if re.match(pattern, final_text):
+    for pattern in PLATE_PATTERNS:
+        if pattern.match(final_text):
             if 4 <= len(final_text) <= 8:
-                logger.info(f"{debug_info}✅ Valid: '{final_text}' matches {pattern}")
+                logger.info(f"{debug_info}✅ Valid: '{final_text}' matches {pattern.pattern}")
                 return final_text
     
     # Fallback: if reasonable, accept it
     if 4 <= len(final_text) <= 8:
-        letters = sum(1 for c in final_text if c.isalpha())
-        digits = sum(1 for c in final_text if c.isdigit())
+        # final_text is only A-Z/0-9, so one pass over the digits gives both counts
+        digits = sum(map(str.isdigit, final_text))
+        letters = len(final_text) - digits
         
         if digits >= 3:
             logger.info(f"{debug_info}⚠️  Accepting: '{final_text}' ({letters}L/{digits}D)")
@@ -163,6 +459,27 @@ def clean_and_validate_plate_text(text, debug_info=""):
     logger.info(f"{debug_info}❌ Rejected: '{final_text}'")
     return None
 
+# ------------------------
+# Fixed error bodies, encoded once
+# ------------------------
+def _encode_error(message):
+    return json.dumps({"success": False, "message": message}, separators=(",", ":")).encode()
+
+
+NO_IMAGE_BODY = _encode_error("No image provided")
+EMPTY_IMAGE_BODY = _encode_error("Empty image file")
+INVALID_IMAGE_BODY = _encode_error("Invalid image format")
+NO_PLATE_BODY = _encode_error(
+    "No license plate detected. Ensure:\n• Plate is clearly visible\n• Good lighting conditions\n• Plate is within focus area"
+)
+PROCESSING_ERROR_BODY = _encode_error("Error processing image")
+
+
+def _error_response(body, status):
+    # A fresh Response per call: after-request hooks (CORS, session) mutate headers
+    return Response(body, status=status, mimetype="application/json")
+
+
 # ------------------------
 # Fixed Plate detection endpoint
 # ------------------------
@@ -170,17 +487,16 @@ def clean_and_validate_plate_text(text, debug_info=""):
 def detect_plate():
     try:
         if 'image' not in request.files:
-            return jsonify({"success": False, "message": "No image provided"}), 400
+            return _error_response(NO_IMAGE_BODY, 400)
         file = request.files['image']
         img_bytes = file.read()
         if not img_bytes:
-            return jsonify({"success": False, "message": "Empty image file"}), 400
+            return _error_response(EMPTY_IMAGE_BODY, 400)
 
         # Convert bytes to OpenCV image
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        img = decode_image(img_bytes)
         if img is None:
-            return jsonify({"success": False, "message": "Invalid image format"}), 400
+            return _error_response(INVALID_IMAGE_BODY, 400)
 
         logger.info(f"📊 Image received: {img.shape}")
 
@@ -193,20 +509,37 @@ def detect_plate():
         # ------------------------
         if yolo_model and ocr_reader:
             try:
-                # Use adaptive confidence thresholds
-                # Start with 0.25 (your original), but try lower if needed
-                confidence_thresholds = [0.25, 0.15, 0.1, 0.05]
+                # Single forward pass at the lowest threshold; boxes are tried best-first
+                # Shrink large photos for YOLO; crops are still cut from the full-resolution image
+                yolo_scale = min(1.0, YOLO_MAX_INPUT_SIDE / max(img.shape[:2]))
+                if yolo_scale < 1.0:
+                    yolo_img = cv2.resize(img, None, fx=yolo_scale, fy=yolo_scale, interpolation=cv2.INTER_AREA)
+                else:
+                    yolo_img = img
+                result = yolo_batcher.predict(yolo_img, conf=YOLO_MIN_CONF)
                 
-                for conf_thresh in confidence_thresholds:
-                    results = yolo_model.predict(img, verbose=False, conf=conf_thresh)
+                # Check if any detections
+                if result.boxes is not None and len(result.boxes) > 0:
+                    boxes = sorted(result.boxes, key=lambda box: float(box.conf), reverse=True)
+                    logger.info(f"📊 YOLO predictions: {len(boxes)} boxes at conf>={YOLO_MIN_CONF}")
                     
-                    # Check if any detections
-                    if results[0].boxes is not None and len(results[0].boxes) > 0:
-                        logger.info(f"📊 YOLO predictions: {len(results[0].boxes)} boxes at conf={conf_thresh}")
+                    ranked = [
+                        (idx, float(r.conf), tuple(int(float(v) / yolo_scale) for v in r.xyxy[0]))
+                        for idx, r in enumerate(boxes)
+                    ]
+                    
+                    # OCR the most confident box first; the rest only if they can still beat it
+                    for wave in (ranked[:1], ranked[1:]):
+                        if best_conf >= 0.6:  # Good enough, stop processing
+                            break
+                        
+                        # Best achievable score assumes a perfect OCR confidence of 1.0
+                        wave = [box for box in wave if (box[1] * 0.6) + 0.4 > best_conf]
                         
-                        for idx, r in enumerate(results[0].boxes):
-                            conf = float(r.conf)
-                            x1, y1, x2, y2 = map(int, r.xyxy[0])
+                        # Collect (box, raw crop) for every box in this wave
+                        candidates = []
+                        for box in wave:
+                            idx, conf, (x1, y1, x2, y2) = box
                             
                             logger.info(f"📊 Detected box {idx+1}: conf={conf:.2f}, coords=({x1},{y1},{x2},{y2})")
                             
@@ -235,38 +568,22 @@ def detect_plate():
                                 plate_crop = cv2.resize(plate_crop, (new_w, new_h), interpolation=cv2.INTER_CUBIC)
                                 logger.info(f"📊 Resized crop to: {plate_crop.shape}")
                             
-                            # Preprocess for better OCR
-                            processed_crop = preprocess_plate_image(plate_crop)
-                            
-                            # OCR with multiple attempts
-                            ocr_attempts = []
-                            
-                            # Attempt 1: Normal OCR
-                            try:
-                                ocr_results = ocr_reader.readtext(
-                                    processed_crop,
-                                    allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                                    width_ths=0.7,
-                                    height_ths=0.7
-                                )
-                                ocr_attempts.extend(ocr_results)
-                            except Exception as ocr_err:
-                                logger.warning(f"OCR attempt 1 failed: {ocr_err}")
-                            
-                            # Attempt 2: Original image if first failed
-                            if not ocr_attempts:
-                                try:
-                                    ocr_results = ocr_reader.readtext(
-                                        plate_crop,
-                                        allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                                        width_ths=0.5
-                                    )
-                                    ocr_attempts.extend(ocr_results)
-                                except Exception as ocr_err:
-                                    logger.warning(f"OCR attempt 2 failed: {ocr_err}")
-                            
+                            candidates.append((box, plate_crop))
+                        
+                        # Batched OCR on the CLAHE-enhanced crops; the raw crop is only
+                        # read for boxes where that found no text at all
+                        ocr_batches = read_plates_batched(
+                            [preprocess_plate_image(crop) for _, crop in candidates], **OCR_ENHANCED_KWARGS
+                        ) if candidates else []
+                        retry = [i for i, ocr_results in enumerate(ocr_batches) if not ocr_results]
+                        if retry:
+                            raw_batches = read_plates_batched([candidates[i][1] for i in retry], **OCR_RAW_KWARGS)
+                            for i, ocr_results in zip(retry, raw_batches):
+                                ocr_batches[i] = ocr_results
+                        
+                        for ((idx, conf, coords), _), ocr_results in zip(candidates, ocr_batches):
                             # Process OCR results
-                            for _, text, text_conf in ocr_attempts:
+                            for _, text, text_conf in ocr_results:
                                 logger.info(f"📊 OCR raw text: '{text}' (conf={text_conf:.2f})")
                                 
                                 # Clean and validate the text
@@ -284,7 +601,7 @@ def detect_plate():
                                         best_details = {
                                             'yolo_conf': conf,
                                             'ocr_conf': text_conf,
-                                            'coords': (x1, y1, x2, y2),
+                                            'coords': coords,
                                             'original_text': text
                                         }
                                         
@@ -294,10 +611,6 @@ def detect_plate():
                             
                             if best_conf >= 0.6:  # Good enough, stop processing
                                 break
-                    
-                    # If we found a plate with this threshold, move on
-                    if best_plate:
-                        break
                         
             except Exception as e:
                 logger.exception(f"YOLO/EasyOCR detection failed: {e}")
@@ -306,8 +619,12 @@ def detect_plate():
         # Return JSON result
         # ------------------------
         if best_plate:
-            session['detected_plate'] = best_plate
-            session['detection_confidence'] = float(best_conf)
+            # Store the plate once the JSON body has been built
+            @after_this_request
+            def remember_detected_plate(response):
+                session['detected_plate'] = best_plate
+                session['detection_confidence'] = float(best_conf)
+                return response
             
             logger.info(f"✅ SUCCESS: Plate detected: {best_plate} (conf={best_conf:.2f})")
             
@@ -323,14 +640,11 @@ def detect_plate():
             })
 
         logger.warning("❌ No license plate detected")
-        return jsonify({
-            "success": False, 
-            "message": "No license plate detected. Ensure:\n• Plate is clearly visible\n• Good lighting conditions\n• Plate is within focus area"
-        })
+        return _error_response(NO_PLATE_BODY, 200)
 
     except Exception as e:
         logger.exception(f"Detection error: {e}")
-        return jsonify({"success": False, "message": f"Error processing image"}), 500
+        return _error_response(PROCESSING_ERROR_BODY, 500)
 
 
 # ------------------------
@@ -1,25 +1,43 @@
 from flask import Blueprint, request, jsonify, session, render_template, redirect, url_for
 from werkzeug.security import check_password_hash, generate_password_hash
-from mysql.connector import Error
+from mysql.connector import Error, IntegrityError
+import calendar
 import logging
 from datetime import datetime, timedelta
 import re
+import threading
 from functools import wraps
-from utils.database import get_connection, _safe_close
+from utils.cache import TTLCache, register_write_cache, clear_write_caches
+from utils.database import get_connection, transaction, _safe_close
+from utils.session import session_read_only
 
 mechanic_bp = Blueprint('mechanic', __name__, url_prefix='/mechanic')
 logger = logging.getLogger(__name__)
 
 
+# Input validation patterns, compiled once at import
+_PLATE_RE = re.compile(r'^[A-Z][0-9]{1,6}$')
+_PLATE_LOOKUP_RE = re.compile(r'^[A-Z0-9]{4,12}$')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Characters rejected in owner names
+_UNSAFE_NAME_CHARS = frozenset('<>{}[];')
+# Phone separators dropped before validation: '+', '-', parentheses and every character
+# str.isspace() (and regex \s) treats as whitespace, e.g. the no-break space pasted from web pages
+_PHONE_WHITESPACE = (
+    ' \t\n\r\f\v\x1c\x1d\x1e\x1f\x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+)
+_PHONE_STRIP_TABLE = str.maketrans('', '', '+-()' + _PHONE_WHITESPACE)
+
+
 def add_months(date, months):
     """Safely add months to a date, handling year rollovers and varying month lengths"""
     month = date.month - 1 + months
     year = date.year + month // 12
     month = month % 12 + 1
-    day = min(date.day, [31,
-        29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28,
-        31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month-1])
-    return datetime(year, month, day).date()
+    days_in_month = calendar.monthrange(year, month)[1]
+    return datetime(year, month, min(date.day, days_in_month)).date()
 # ===============================
 # DECORATORS & UTILITIES - STRICT MECHANIC ONLY
 # ===============================
@@ -34,38 +52,80 @@ def mechanic_login_required(f):
     return decorated_function
 
 
+def _list_page_args(max_limit=500):
+    """Parse ?limit=&offset= for list endpoints, clamped to sane bounds.
+
+    Pagination is opt-in: without a usable ?limit= the limit is None and the
+    whole list is returned.
+    """
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if limit is None:
+        return None, 0
+    return max(1, min(limit, max_limit)), max(0, offset)
+
+
+def _fetch_list_page(cursor, sql, limit, offset):
+    """Run a list query, paginated only when a limit is given; returns (rows, has_more)"""
+    if limit is None:
+        cursor.execute(sql)
+        return cursor.fetchall(), False
+    # One extra row tells us whether another page exists
+    cursor.execute(sql + " LIMIT %s OFFSET %s", (limit + 1, offset))
+    rows = cursor.fetchall()
+    return rows[:limit], len(rows) > limit
+
+
+def _revalidated_json(payload):
+    """JSON response with an ETag; unchanged payloads come back as 304 without a body"""
+    response = jsonify(payload)
+    # Browsers must revalidate so mechanic writes show up on the next refresh
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
 # ===============================
 # TEMPLATE ROUTES - STRICT MECHANIC ONLY
 # ===============================
 
+_PAGE_ENDPOINTS = frozenset({
+    "mechanic.mechanic_dashboard",
+    "mechanic.mechanic_appointments_page",
+    "mechanic.mechanic_service_history_page",
+    "mechanic.mechanic_reports_page",
+    "mechanic.admin_dashboard",
+    "mechanic.admin_appointments_page",
+    "mechanic.admin_service_history_page",
+})
+
+
+@mechanic_bp.before_request
+def redirect_logged_out_pages():
+    """Send visitors without a mechanic session from any page route to the login page"""
+    if request.endpoint in _PAGE_ENDPOINTS and not session.get("mechanic_logged_in"):
+        return redirect("/mechanic/login.html")
+
+
 @mechanic_bp.route("/dashboard")
 def mechanic_dashboard():
     """Serve the mechanic dashboard - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
-    
     username = session.get("mechanic_username", "Mechanic")
     return render_template("mechanic_dashboard.html", username=username)
 
 @mechanic_bp.route("/appointments")
 def mechanic_appointments_page():
     """Serve mechanic appointments page - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
     return render_template("mechanic_appointments.html", username=session.get("mechanic_username"))
 
 @mechanic_bp.route("/service-history")
 def mechanic_service_history_page():
     """Serve mechanic service history page - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
     return render_template("mechanic_service_history.html", username=session.get("mechanic_username"))
 
 @mechanic_bp.route("/reports")
 def mechanic_reports_page():
     """Serve mechanic reports page - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
     return render_template("mechanic_reports.html", username=session.get("mechanic_username"))
 
 # ===============================
@@ -75,116 +135,114 @@ def mechanic_reports_page():
 @mechanic_bp.route("/admin/dashboard")
 def admin_dashboard():
     """Serve admin dashboard page - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
-    
     username = session.get("mechanic_username", "Admin")
     return render_template("mechanic_dashboard.html", username=username)
 
 @mechanic_bp.route("/admin/appointments")
 def admin_appointments_page():
     """Serve admin appointments page - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
     return render_template("mechanic_appointments.html", username=session.get("mechanic_username"))
 
 @mechanic_bp.route("/admin/service-history")
 def admin_service_history_page():
     """Serve admin service history page - MECHANIC SESSION ONLY"""
-    if not session.get("mechanic_logged_in"):
-        return redirect("/mechanic/login.html")
     return render_template("mechanic_service_history.html", username=session.get("mechanic_username"))
 
 # ===============================
 # DASHBOARD API ROUTES - MECHANIC SESSION ONLY
 # ===============================
 
-@mechanic_bp.route('/api/dashboard-stats', methods=['GET'])
-@mechanic_login_required
-def get_dashboard_stats():
-    """API endpoint for dashboard statistics with real database values"""
-    logger.info("Dashboard stats requested")
-    
+_DASHBOARD_STATS_SQL = """
+    SELECT
+        -- Services completed today / this week - ONLY from service_history table (after-service form)
+        -- Plain ranges on Service_Date so idx_sh_service_date is usable
+        (SELECT COUNT(*) FROM service_history
+            WHERE Service_Date >= CURDATE() AND Service_Date < CURDATE() + INTERVAL 1 DAY) AS today_services,
+        (SELECT COUNT(*) FROM service_history
+            WHERE Service_Date >= CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY
+            AND Service_Date < CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY + INTERVAL 7 DAY) AS completed_week,
+        -- Appointments are separate from services
+        (SELECT COUNT(*) FROM appointment WHERE Date = CURDATE()) AS today_appointments,
+        (SELECT COUNT(*) FROM appointment WHERE Date >= CURDATE()) AS pending_services,
+        -- Urgent jobs (overdue oil changes) - Based on car table
+        (SELECT COUNT(*) FROM car WHERE Next_Oil_Change IS NOT NULL AND Next_Oil_Change < CURDATE()) AS urgent_jobs,
+        (SELECT COUNT(*) FROM car) AS total_cars,
+        (SELECT COUNT(*) FROM owner) AS total_owners,
+        (SELECT COUNT(*) FROM service_history) AS total_services
+"""
+
+# Counters only move on writes; any successful write request drops the entry straight away
+_DASHBOARD_STATS_CACHE = register_write_cache(TTLCache(maxsize=1, ttl=30))
+_DASHBOARD_STATS_LOCK = threading.Lock()
+# Last good counters, served to other requests while one refresh is running
+_DASHBOARD_STATS_STALE = TTLCache(maxsize=1, ttl=300)
+
+
+# Per-plate MAX(Mileage); short TTL bounds staleness from writes that bypass the web app
+_MILEAGE_CACHE = register_write_cache(TTLCache(maxsize=4096, ttl=10))
+# check-owner answers by phone; the front-end re-queries as the number is typed
+_OWNER_LOOKUP_CACHE = register_write_cache(TTLCache(maxsize=2048, ttl=30))
+# Owner and ownerless-car list pages keyed by (list, limit, offset)
+_LIST_PAGE_CACHE = register_write_cache(TTLCache(maxsize=256, ttl=15))
+
+mechanic_bp.after_request(clear_write_caches)
+
+
+def _query_dashboard_stats():
     conn = None
     cursor = None
     try:
         conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Today's services count - ONLY from service_history table (after-service form)
-        cursor.execute("""
-            SELECT COUNT(*) as count 
-            FROM service_history 
-            WHERE DATE(Service_Date) = CURDATE()
-        """)
-        today_services_result = cursor.fetchone()
-        today_services = today_services_result[0] if today_services_result else 0
-        
-        # Completed this week - ONLY from service_history table
-        cursor.execute("""
-            SELECT COUNT(*) as count 
-            FROM service_history 
-            WHERE YEARWEEK(Service_Date, 1) = YEARWEEK(CURDATE(), 1)
-        """)
-        completed_week_result = cursor.fetchone()
-        completed_week = completed_week_result[0] if completed_week_result else 0
-        
-        # Today's appointments - This is separate from services
-        cursor.execute("SELECT COUNT(*) as count FROM appointment WHERE Date = CURDATE()")
-        today_appointments_result = cursor.fetchone()
-        today_appointments = today_appointments_result[0] if today_appointments_result else 0
-        
-        # Total appointments - Separate from services
-        cursor.execute("SELECT COUNT(*) as count FROM appointment")
-        total_appointments_result = cursor.fetchone()
-        total_appointments = total_appointments_result[0] if total_appointments_result else 0
-        
-        # Urgent jobs (overdue oil changes) - Based on car table
-        cursor.execute("""
-            SELECT COUNT(*) as count 
-            FROM car 
-            WHERE Next_Oil_Change IS NOT NULL 
-            AND Next_Oil_Change < CURDATE()
-        """)
-        urgent_jobs_result = cursor.fetchone()
-        urgent_jobs = urgent_jobs_result[0] if urgent_jobs_result else 0
-        
-        # Total cars
-        cursor.execute("SELECT COUNT(*) as count FROM car")
-        total_cars_result = cursor.fetchone()
-        total_cars = total_cars_result[0] if total_cars_result else 0
-        
-        # Total owners
-        cursor.execute("SELECT COUNT(*) as count FROM owner")
-        total_owners_result = cursor.fetchone()
-        total_owners = total_owners_result[0] if total_owners_result else 0
-        
-        # Total services performed (all time) - from service_history
-        cursor.execute("SELECT COUNT(*) as count FROM service_history")
-        total_services_result = cursor.fetchone()
-        total_services = total_services_result[0] if total_services_result else 0
+        cursor = conn.cursor(dictionary=True)
         
-        # Services pending (appointments) - This is separate
-        cursor.execute("SELECT COUNT(*) as count FROM appointment WHERE Date >= CURDATE()")
-        pending_services_result = cursor.fetchone()
-        pending_services = pending_services_result[0] if pending_services_result else 0
+        # Every counter in one round-trip
+        cursor.execute(_DASHBOARD_STATS_SQL)
+        stats = cursor.fetchone() or {}
+        today_services = stats.get("today_services") or 0
+        completed_week = stats.get("completed_week") or 0
+        today_appointments = stats.get("today_appointments") or 0
         
         logger.info("Stats - Today Services: %s, Week: %s, Today Appointments: %s", 
                    today_services, completed_week, today_appointments)
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "today_services": today_services,  # Services completed today (from service_history)
-                "completed_week": completed_week,  # Services completed this week (from service_history)
-                "today_appointments": today_appointments,  # Appointments scheduled for today
-                "pending_services": pending_services,  # Future appointments
-                "urgent_jobs": urgent_jobs,  # Cars with overdue oil changes
-                "total_cars": total_cars,
-                "total_owners": total_owners,
-                "total_services": total_services  # All services ever performed
-            }
-        })
+        return {
+            "today_services": today_services,  # Services completed today (from service_history)
+            "completed_week": completed_week,  # Services completed this week (from service_history)
+            "today_appointments": today_appointments,  # Appointments scheduled for today
+            "pending_services": stats.get("pending_services") or 0,  # Future appointments
+            "urgent_jobs": stats.get("urgent_jobs") or 0,  # Cars with overdue oil changes
+            "total_cars": stats.get("total_cars") or 0,
+            "total_owners": stats.get("total_owners") or 0,
+            "total_services": stats.get("total_services") or 0  # All services ever performed
+        }
+    finally:
+        _safe_close(cursor, conn)
+
+
+@mechanic_bp.route('/api/dashboard-stats', methods=['GET'])
+@mechanic_login_required
+def get_dashboard_stats():
+    """API endpoint for dashboard statistics with real database values"""
+    logger.info("Dashboard stats requested")
+    
+    try:
+        data = _DASHBOARD_STATS_CACHE.get("stats")
+        if data is None:
+            # One refresh at a time; others serve the last counters, or wait if there are none
+            stale = _DASHBOARD_STATS_STALE.get("stats")
+            if _DASHBOARD_STATS_LOCK.acquire(blocking=stale is None):
+                try:
+                    data = _DASHBOARD_STATS_CACHE.get("stats")
+                    if data is None:
+                        data = _query_dashboard_stats()
+                        _DASHBOARD_STATS_CACHE.set("stats", data)
+                        _DASHBOARD_STATS_STALE.set("stats", data)
+                finally:
+                    _DASHBOARD_STATS_LOCK.release()
+            else:
+                data = stale
+        
+        return _revalidated_json({"success": True, "data": data})
         
     except Error as db_err:
         logger.exception("Database error while loading dashboard stats")
@@ -192,13 +250,144 @@ def get_dashboard_stats():
     except Exception:
         logger.exception("Unhandled error while loading dashboard stats")
         return jsonify({"success": False, "message": "Internal server error"}), 500
-    finally:
-        _safe_close(cursor, conn)
+
+
+_ACTIVITY_ICONS = {
+    "oil": "⛽",
+    "tire": "🌀",
+    "brake": "🛑",
+    "service": "🛠️",  # Default service icon
+}
+
+
+_RECENT_ACTIVITY_TEMPLATE = '''
+    (
+        SELECT 
+            'service' as kind,
+            sh.History_ID as activity_id,
+            -- ISO-8601 text straight from MySQL (DATE or DATETIME)
+            REPLACE(CAST(sh.Service_Date AS CHAR), ' ', 'T') as timestamp,
+            NULL as appointment_time,
+            sh.Car_plate as plate,
+            sh.Mileage,
+            sh.Notes,
+            CASE
+                WHEN LOWER(sh.Notes) LIKE '%oil%' THEN 'oil'
+                WHEN LOWER(sh.Notes) LIKE '%tire%' THEN 'tire'
+                WHEN LOWER(sh.Notes) LIKE '%brake%' THEN 'brake'
+                ELSE 'service'
+            END as icon_kind,
+            c.Model as car_model,
+            o.Owner_Name as owner_name
+        FROM service_history sh
+        LEFT JOIN car c ON sh.Car_plate = c.Car_plate
+        LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
+        {service_filter}
+        ORDER BY sh.Service_Date DESC, sh.History_ID DESC
+        LIMIT %s {service_offset}
+    )
+    UNION ALL
+    (
+        -- Upcoming appointments only pad the feed when this page has fewer than 5 services
+        SELECT 
+            'appointment',
+            a.Appointment_ID,
+            CAST(a.Date AS CHAR),
+            TIME_FORMAT(a.Time, '%H:%i'),
+            a.Car_plate,
+            NULL,
+            a.Notes,
+            NULL,
+            c.Model,
+            o.Owner_Name
+        FROM appointment a
+        LEFT JOIN car c ON a.Car_plate = c.Car_plate
+        LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
+        WHERE a.Date >= CURDATE()
+        AND (%s < 5 OR NOT EXISTS (
+            SELECT 1 FROM (SELECT 1 FROM service_history sh {service_filter} LIMIT 1 OFFSET %s) fifth
+        ))
+        ORDER BY a.Date, a.Time
+        LIMIT 5
+    )
+    ORDER BY timestamp DESC, kind DESC, activity_id DESC
+    LIMIT %s
+'''
+
+_RECENT_ACTIVITY_SQL = _RECENT_ACTIVITY_TEMPLATE.format(service_filter="", service_offset="OFFSET %s")
+
+# Keyset page: services strictly older than the (Service_Date, History_ID) cursor
+_RECENT_ACTIVITY_AFTER_CURSOR_SQL = _RECENT_ACTIVITY_TEMPLATE.format(
+    service_filter="WHERE sh.Service_Date < %s OR (sh.Service_Date = %s AND sh.History_ID < %s)",
+    service_offset=""
+)
+
+_ACTIVITY_CURSOR_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?)?)\|(\d+)$')
+
+
+def _format_service_activity(activity_id, timestamp, plate, mileage, notes, icon_kind, car_model, owner, now_iso):
+    # Timestamps arrive pre-formatted as ISO-8601 text
+    timestamp_str = timestamp or now_iso
+    
+    # Create meaningful description
+    parts = [f"Service completed for {plate}"]
+    if car_model:
+        parts.append(f" ({car_model})")
+    if owner:
+        parts.append(f" - Owner: {owner}")
+    if mileage:
+        parts.append(f" - Mileage: {mileage:,} km")
+    stripped_notes = (notes or '').strip()
+    if stripped_notes and stripped_notes.lower() != 'initial car registration':
+        parts.append(f" - Notes: {notes}")
+    
+    # Icon kind is classified from the notes in SQL
+    icon = _ACTIVITY_ICONS.get(icon_kind, _ACTIVITY_ICONS['service'])
+    
+    return {
+        "type": "service",
+        "title": "Service Completed",
+        "description": "".join(parts),
+        "timestamp": timestamp_str,
+        "plate": plate,
+        "owner": owner,
+        "mileage": mileage,
+        "icon": icon,
+        "id": activity_id
+    }
+
+
+def _format_appointment_activity(activity_id, date, time, plate, car_model, owner):
+    # Date and HH:MM time arrive pre-formatted from MySQL
+    timestamp_str = date or ""
+    time_str = time or ""
+    
+    parts = [f"Appointment scheduled for {plate}"]
+    if car_model:
+        parts.append(f" ({car_model})")
+    if owner:
+        parts.append(f" - Owner: {owner}")
+    if time_str:
+        parts.append(f" at {time_str}")
+    
+    return {
+        "type": "appointment",
+        "title": "Upcoming Appointment",
+        "description": "".join(parts),
+        "timestamp": timestamp_str,
+        "plate": plate,
+        "owner": owner,
+        "icon": "📅",
+        "id": activity_id
+    }
+
+
 @mechanic_bp.route('/api/recent-activity', methods=['GET'])
 @mechanic_login_required
 def get_recent_activity():
     """API endpoint for recent activity with REAL data - DEBUGGED VERSION"""
     logger.info("Recent activity requested - DEBUGGED VERSION")
+    now_iso = datetime.now().isoformat()
 
     # Safely parse pagination params
     try:
@@ -220,164 +409,41 @@ def get_recent_activity():
     if offset < 0:
         offset = 0
 
+    # Keyset cursor "<service date>|<history id>" from a previous page's next_cursor
+    cursor_match = _ACTIVITY_CURSOR_RE.match(request.args.get('cursor', ''))
+
     conn = None
     cursor = None
     try:
         conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # ============================================
-        # SIMPLIFIED QUERY - FIXED VERSION
-        # ============================================
-        
-        # Get recent service history (most reliable source)
-        cursor.execute('''
-            SELECT 
-                sh.History_ID,
-                sh.Service_Date as timestamp,
-                sh.Car_plate as plate,
-                sh.Mileage,
-                sh.Notes,
-                c.Model as car_model,
-                o.Owner_Name as owner_name
-            FROM service_history sh
-            LEFT JOIN car c ON sh.Car_plate = c.Car_plate
-            LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
-            ORDER BY sh.Service_Date DESC
-            LIMIT %s OFFSET %s
-        ''', (limit, offset))
+        cursor = conn.cursor()
 
+        # Services and fallback appointments come back merged and sorted by MySQL
+        if cursor_match:
+            before_date, before_id = cursor_match.group(1), int(cursor_match.group(2))
+            keyset = (before_date, before_date, before_id)
+            cursor.execute(_RECENT_ACTIVITY_AFTER_CURSOR_SQL, keyset + (limit, limit) + keyset + (4, limit))
+        else:
+            cursor.execute(_RECENT_ACTIVITY_SQL, (limit, offset, limit, offset + 4, limit))
         activities = cursor.fetchall()
-        logger.info(f"Found {len(activities)} service history records")
+        logger.info(f"Found {len(activities)} activity records")
         
         # ============================================
         # FORMAT ACTIVITIES PROPERLY
         # ============================================
         formatted_activities = []
-        
-        for activity in activities:
-            timestamp = activity.get('timestamp')
-            
-            # Format timestamp
-            if timestamp:
-                if hasattr(timestamp, 'isoformat'):
-                    timestamp_str = timestamp.isoformat()
-                else:
-                    timestamp_str = str(timestamp)
+        next_cursor = None
+        
+        # Plain tuples in _RECENT_ACTIVITY_SQL column order
+        for kind, activity_id, timestamp, appointment_time, plate, mileage, notes, icon_kind, car_model, owner in activities:
+            if kind == 'appointment':
+                formatted_activities.append(
+                    _format_appointment_activity(activity_id, timestamp, appointment_time, plate, car_model, owner)
+                )
             else:
-                timestamp_str = datetime.now().isoformat()
-            
-            # Create meaningful description
-            plate = activity.get('plate', 'Unknown')
-            car_model = activity.get('car_model', '')
-            owner = activity.get('owner_name', '')
-            mileage = activity.get('Mileage')
-            notes = activity.get('Notes', '')
-            
-            description = f"Service completed for {plate}"
-            if car_model:
-                description += f" ({car_model})"
-            if owner:
-                description += f" - Owner: {owner}"
-            if mileage:
-                description += f" - Mileage: {mileage:,} km"
-            if notes and notes.strip() and notes.strip().lower() != 'initial car registration':
-                description += f" - Notes: {notes}"
-            
-            # Determine icon based on notes/content
-            icon = "🛠️"  # Default service icon
-            if "oil" in notes.lower():
-                icon = "⛽"
-            elif "tire" in notes.lower():
-                icon = "🌀"
-            elif "brake" in notes.lower():
-                icon = "🛑"
-            
-            formatted_activities.append({
-                "type": "service",
-                "title": "Service Completed",
-                "description": description,
-                "timestamp": timestamp_str,
-                "plate": plate,
-                "owner": owner,
-                "mileage": mileage,
-                "icon": icon,
-                "id": activity.get('History_ID')
-            })
-        
-        # If no service history, get some appointments as fallback
-        if len(formatted_activities) < 5:
-            logger.info("Few service records, fetching appointments as well")
-            cursor.execute('''
-                SELECT 
-                    a.Appointment_ID,
-                    a.Date as appointment_date,
-                    a.Time as appointment_time,
-                    a.Car_plate as plate,
-                    a.Notes,
-                    c.Model as car_model,
-                    o.Owner_Name as owner_name
-                FROM appointment a
-                LEFT JOIN car c ON a.Car_plate = c.Car_plate
-                LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
-                WHERE a.Date >= CURDATE()
-                ORDER BY a.Date, a.Time
-                LIMIT 5
-            ''')
-            
-            appointments = cursor.fetchall()
-            
-            for appointment in appointments:
-                date = appointment.get('appointment_date')
-                time = appointment.get('appointment_time')
-                
-                # Format timestamp
-                timestamp_str = ""
-                if date:
-                    if hasattr(date, 'isoformat'):
-                        timestamp_str = date.isoformat()
-                    else:
-                        timestamp_str = str(date)
-                
-                plate = appointment.get('plate', 'Unknown')
-                car_model = appointment.get('car_model', '')
-                owner = appointment.get('owner_name', '')
-                
-                # Format time if available
-                time_str = ""
-                if time:
-                    if isinstance(time, timedelta):
-                        total_seconds = int(time.total_seconds())
-                        hours = total_seconds // 3600
-                        minutes = (total_seconds % 3600) // 60
-                        time_str = f"{hours:02d}:{minutes:02d}"
-                    else:
-                        time_str = str(time)
-                
-                description = f"Appointment scheduled for {plate}"
-                if car_model:
-                    description += f" ({car_model})"
-                if owner:
-                    description += f" - Owner: {owner}"
-                if time_str:
-                    description += f" at {time_str}"
-                
-                formatted_activities.append({
-                    "type": "appointment",
-                    "title": "Upcoming Appointment",
-                    "description": description,
-                    "timestamp": timestamp_str,
-                    "plate": plate,
-                    "owner": owner,
-                    "icon": "📅",
-                    "id": appointment.get('Appointment_ID')
-                })
-        
-        # Sort all activities by timestamp (most recent first)
-        formatted_activities.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
-        # Limit to requested number
-        formatted_activities = formatted_activities[:limit]
+                activity = _format_service_activity(activity_id, timestamp, plate, mileage, notes, icon_kind, car_model, owner, now_iso)
+                formatted_activities.append(activity)
+                next_cursor = f"{activity['timestamp']}|{activity_id}"
         
         logger.info("Returning %d formatted activities", len(formatted_activities))
         
@@ -388,15 +454,16 @@ def get_recent_activity():
                 "type": "info",
                 "title": "Welcome to the System!",
                 "description": "No activities yet. Start by adding a car or completing a service.",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso,
                 "icon": "👋",
                 "is_placeholder": True
             })
         
-        return jsonify({
+        return _revalidated_json({
             "success": True,
             "data": formatted_activities,
             "total": len(formatted_activities),
+            "next_cursor": next_cursor,
             "message": f"Found {len(formatted_activities)} activities"
         })
 
@@ -409,7 +476,7 @@ def get_recent_activity():
                 "type": "error",
                 "title": "Database Connection Issue",
                 "description": "Temporary issue loading activities. Please try again.",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso,
                 "icon": "⚠️",
                 "is_error": True
             }],
@@ -443,9 +510,13 @@ def delete_appointment(appointment_id):
         conn = get_connection()
         cursor = conn.cursor()
         
-        # Delete operations
-        cursor.execute("DELETE FROM appointment_service WHERE Appointment_ID = %s", (appointment_id,))
-        cursor.execute("DELETE FROM appointment WHERE Appointment_ID = %s", (appointment_id,))
+        # Appointment and its service links in one statement
+        cursor.execute("""
+            DELETE a, aps
+            FROM appointment a
+            LEFT JOIN appointment_service aps ON aps.Appointment_ID = a.Appointment_ID
+            WHERE a.Appointment_ID = %s
+        """, (appointment_id,))
         
         conn.commit()  # ← MUST HAVE THIS
         
@@ -464,6 +535,35 @@ def delete_appointment(appointment_id):
     finally:
         _safe_close(cursor, conn)  # ← Use the SAME cleanup as other routes
 
+# Slot check and update in one statement; other rows in the target slot block the update
+_UPDATE_APPOINTMENT_SQL = """
+    UPDATE appointment a
+    LEFT JOIN appointment other
+        ON other.Date = COALESCE(%s, a.Date)
+        AND other.Time = COALESCE(%s, a.Time)
+        AND other.Appointment_ID != a.Appointment_ID
+    SET a.Date = COALESCE(%s, a.Date), a.Time = COALESCE(%s, a.Time), a.Notes = %s
+    WHERE a.Appointment_ID = %s
+      AND (other.Appointment_ID IS NULL
+           OR (a.Date = COALESCE(%s, a.Date) AND a.Time = COALESCE(%s, a.Time)))
+"""
+
+_APPOINTMENT_SLOT_SQL = """
+    SELECT 
+        a.Date,
+        a.Time,
+        NOT (a.Date = COALESCE(%s, a.Date) AND a.Time = COALESCE(%s, a.Time))
+        AND EXISTS(
+            SELECT 1 
+            FROM appointment other 
+            WHERE other.Date = COALESCE(%s, a.Date) 
+              AND other.Time = COALESCE(%s, a.Time) 
+              AND other.Appointment_ID != a.Appointment_ID
+        ) as has_conflict
+    FROM appointment a
+    WHERE a.Appointment_ID = %s
+"""
+
 @mechanic_bp.route("/api/appointments/<int:appointment_id>", methods=['PUT'])
 @mechanic_login_required
 def update_appointment(appointment_id):
@@ -507,67 +607,44 @@ def update_appointment(appointment_id):
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # 1. Get current appointment details to check if date/time are being changed
-        cursor.execute("""
-            SELECT Appointment_ID, Date, Time, Car_plate 
-            FROM appointment 
-            WHERE Appointment_ID = %s
-        """, (appointment_id,))
-        
-        current_appointment = cursor.fetchone()
-        if not current_appointment:
-            return jsonify({
-                "success": False,
-                "message": f"Appointment #{appointment_id} not found"
-            }), 404
-        
-        # 2. Check time slot availability ONLY if date or time are being changed
-        current_date = current_appointment['Date']
-        current_time = current_appointment['Time']
-        
-        # Convert timedelta to string for comparison if needed
-        if current_time and isinstance(current_time, timedelta):
-            total_seconds = int(current_time.total_seconds())
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            current_time_str = f"{hours:02d}:{minutes:02d}"
-        else:
-            current_time_str = str(current_time) if current_time else None
+        new_date = date or None
+        new_time = time or None
         
-        # Check if date or time are actually being changed
-        date_changed = (date and date != str(current_date))
-        time_changed = (time and time != current_time_str)
+        # Update only if no other appointment holds the target slot (unchanged slots are never a conflict)
+        cursor.execute(_UPDATE_APPOINTMENT_SQL, (new_date, new_time, new_date, new_time, notes, appointment_id, new_date, new_time))
         
-        if date_changed or time_changed:
-            # Time slot check: find conflicting appointments on same date/time
-            cursor.execute("""
-                SELECT COUNT(*) as count 
-                FROM appointment 
-                WHERE Date = %s 
-                  AND Time = %s 
-                  AND Appointment_ID != %s
-            """, (date or current_date, time or current_time_str, appointment_id))
-            
-            conflict_result = cursor.fetchone()
-            conflict_count = conflict_result['count'] if conflict_result else 0
+        if cursor.rowcount == 0:
+            # Nothing changed: the appointment is missing, the slot is taken, or the values were identical
+            cursor.execute(_APPOINTMENT_SLOT_SQL, (new_date, new_time, new_date, new_time, appointment_id))
+            current_appointment = cursor.fetchone()
+            if not current_appointment:
+                conn.rollback()
+                return jsonify({
+                    "success": False,
+                    "message": f"Appointment #{appointment_id} not found"
+                }), 404
             
-            if conflict_count > 0:
+            if current_appointment['has_conflict']:
+                conn.rollback()
+                current_time = current_appointment['Time']
+                
+                # Convert timedelta to string for the message if needed
+                if current_time and isinstance(current_time, timedelta):
+                    total_seconds = int(current_time.total_seconds())
+                    hours = total_seconds // 3600
+                    minutes = (total_seconds % 3600) // 60
+                    current_time_str = f"{hours:02d}:{minutes:02d}"
+                else:
+                    current_time_str = str(current_time) if current_time else None
+                
                 return jsonify({
                     "success": False,
-                    "message": f"Time slot unavailable. Another appointment is already booked for {date or current_date} at {time or current_time_str}."
+                    "message": f"Time slot unavailable. Another appointment is already booked for {date or current_appointment['Date']} at {time or current_time_str}."
                 }), 409
         
-        # 3. Update appointment if no conflicts
-        update_query = """
-            UPDATE appointment 
-            SET Date = %s, Time = %s, Notes = %s 
-            WHERE Appointment_ID = %s
-        """
-        cursor.execute(update_query, (date or current_date, time or current_time_str, notes, appointment_id))
-        
         conn.commit()
         
-        logger.info(f"Appointment {appointment_id} updated by {session.get('mechanic_username')} - Date: {date or current_date}, Time: {time or current_time_str}")
+        logger.info(f"Appointment {appointment_id} updated by {session.get('mechanic_username')} - Date: {date or 'unchanged'}, Time: {time or 'unchanged'}")
         
         return jsonify({
             "success": True,
@@ -597,21 +674,22 @@ def get_latest_mileage(plate_number):
     conn = None
     cursor = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get MAXIMUM mileage (not just latest)
-        cursor.execute("""
-            SELECT MAX(Mileage) as max_mileage
-            FROM service_history 
-            WHERE Car_plate = %s
-        """, (plate_number,))
-        
-        result = cursor.fetchone()
-        
-        max_mileage = result['max_mileage'] if result and result['max_mileage'] is not None else 0
+        max_mileage = _MILEAGE_CACHE.get(plate_number)
+        if max_mileage is None:
+            conn = get_connection()
+            cursor = conn.cursor()
+            
+            # Get MAXIMUM mileage (not just latest)
+            cursor.execute("""
+                SELECT COALESCE(MAX(Mileage), 0)
+                FROM service_history 
+                WHERE Car_plate = %s
+            """, (plate_number,))
+            
+            (max_mileage,) = cursor.fetchone() or (0,)
+            _MILEAGE_CACHE.set(plate_number, max_mileage)
         
-        return jsonify({
+        return _revalidated_json({
             "success": True,
             "latest_mileage": max_mileage,
             "max_mileage": max_mileage,
@@ -659,6 +737,42 @@ def detect_plate():
     }), 503
 
 
+# MySQL error code for a PRIMARY/UNIQUE key violation
+_DUPLICATE_ENTRY = 1062
+
+# Every registration conflict (plate, VIN, owner phone, owner email) in one query; NULL params match nothing.
+# Only plate (primary key) and phone (idx_owner_phone) are backed by unique keys; email and VIN are
+# checked here alone, so two concurrent registrations sharing an email or VIN can both succeed.
+_REGISTRATION_DUPLICATES_SQL = """
+    SELECT 'plate' as conflict, c.Car_plate, o.Owner_ID, o.Owner_Name
+    FROM car c
+    LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
+    WHERE c.Car_plate = %s
+    UNION ALL
+    SELECT 'vin', c.Car_plate, o.Owner_ID, o.Owner_Name
+    FROM car c
+    LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
+    WHERE c.VIN = %s
+    UNION ALL
+    SELECT 'phone', NULL, Owner_ID, Owner_Name FROM owner WHERE PhoneNUMB = %s
+    UNION ALL
+    SELECT 'email', NULL, Owner_ID, Owner_Name FROM owner WHERE Owner_Email = %s
+"""
+
+def _insert_owner(cursor, owner_name, owner_email, phone_number):
+    """Insert an owner and return (owner_id, created).
+
+    idx_owner_phone makes a concurrent registration of the same phone match
+    the existing row instead; created is then False and owner_id is that row's.
+    """
+    cursor.execute("""
+        INSERT INTO owner (Owner_Name, Owner_Email, PhoneNUMB)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE Owner_ID = LAST_INSERT_ID(Owner_ID)
+    """, (owner_name, owner_email, phone_number))
+    return cursor.lastrowid, cursor.rowcount not in (0, 2)
+
+
 @mechanic_bp.route("/api/add-car", methods=["POST"])
 @mechanic_login_required
 def add_car():
@@ -686,7 +800,7 @@ def add_car():
     owner_email = data.get('owner_email', '').strip()
     
     # Validation
-    if not car_plate or not re.match(r'^[A-Z]{1}[0-9]{1,6}$', car_plate):
+    if not car_plate or not _PLATE_RE.match(car_plate):
         return jsonify({"status": "error", "message": "Valid license plate is required (1 letter + 1-6 digits)"}), 400
     
     if not model:
@@ -711,160 +825,110 @@ def add_car():
         return jsonify({"status": "error", "message": "Owner name and email are required for new owners"}), 400
     
     # Phone number validation
-    phone_clean = re.sub(r'[+\s\-()]', '', phone_number)
+    phone_clean = phone_number.translate(_PHONE_STRIP_TABLE)
     if len(phone_clean) < 8:
         return jsonify({"status": "error", "message": "Phone number is too short (minimum 8 digits)"}), 400
     
     if len(phone_clean) > 20:
         return jsonify({"status": "error", "message": "Phone number is too long (max 20 characters)"}), 400
     
-    if not phone_clean.isdigit() and not phone_clean.startswith('+'):
+    if not phone_clean.isdigit():
         return jsonify({"status": "error", "message": "Phone number should contain only digits and optional '+' prefix"}), 400
     
+    # NEW FEATURE: Calculate next oil change date if not provided
+    auto_calculated = False
+    if next_oil_change is None or (isinstance(next_oil_change, str) and next_oil_change.strip() == ''):
+        # User didn't provide a date, so we auto-calculate
+        base_date = None
+        if last_service_date:
+            try:
+                base_date = datetime.strptime(last_service_date, '%Y-%m-%d').date()
+            except Exception:
+                base_date = datetime.now().date()
+        else:
+            base_date = datetime.now().date()
+        
+        next_oil_change = add_months(base_date, 3)
+        auto_calculated = True
+        logger.info(f"Auto-calculated next oil change: {next_oil_change} (+3 months from {base_date})")
+    else:
+        # User provided a date, ensure it's valid
+        try:
+            datetime.strptime(next_oil_change, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}), 400
+    
     conn = None
     cursor = None
     try:
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # helper to tolerate mocked cursors
-        def _safe_fetchone():
-            try:
-                return cursor.fetchone()
-            except Exception:
-                return None
-
         # ============================================
-        # DUPLICATE CHECK 1: Car plate
+        # DUPLICATE CHECKS: plate, VIN, phone and email in one round-trip
         # ============================================
-        cursor.execute("SELECT Car_plate, Owner_ID FROM car WHERE Car_plate = %s", (car_plate,))
-        existing_car = _safe_fetchone()
+        check_email = owner_email if owner_type != "existing" and owner_email else None
+        cursor.execute(_REGISTRATION_DUPLICATES_SQL, (car_plate, vin, phone_number, check_email))
+        matches = {}
+        for row in cursor.fetchall():
+            matches.setdefault(row['conflict'], row)
+
+        existing_car = matches.get('plate')
         if existing_car:
-            # Get owner name for better error message
-            cursor.execute("SELECT Owner_Name FROM owner WHERE Owner_ID = %s", (existing_car['Owner_ID'],))
-            existing_owner = _safe_fetchone()
-            owner_name_msg = existing_owner['Owner_Name'] if existing_owner else 'Unknown'
+            owner_name_msg = existing_car['Owner_Name'] or 'Unknown'
             return jsonify({"status": "error", "message": f"Car with plate {car_plate} already exists (Owner: {owner_name_msg})"}), 409
 
-        # ============================================
-        # DUPLICATE CHECK 2: VIN
-        # ============================================
-        cursor.execute("SELECT Car_plate, Owner_ID FROM car WHERE VIN = %s", (vin,))
-        existing_vin = _safe_fetchone()
+        existing_vin = matches.get('vin')
         if existing_vin:
-            # Get owner name for better error message
-            cursor.execute("SELECT Owner_Name FROM owner WHERE Owner_ID = %s", (existing_vin['Owner_ID'],))
-            existing_owner = _safe_fetchone()
-            owner_name_msg = existing_owner['Owner_Name'] if existing_owner else 'Unknown'
+            owner_name_msg = existing_vin['Owner_Name'] or 'Unknown'
             return jsonify({"status": "error", "message": f"VIN {vin} already registered to car: {existing_vin['Car_plate']} (Owner: {owner_name_msg})"}), 409
-        
-        # REMOVE THE AUTOSTART TRANSACTION - FIXED HERE
-        try:
-            autocommit_before = conn.autocommit
-            if not autocommit_before:
-                logger.info("Connection already in transaction mode, proceeding...")
-            else:
-                conn.start_transaction()
-                logger.info("Started new transaction")
-        except Exception as tx_error:
-            logger.warning(f"Transaction check failed: {tx_error}. Continuing...")
-        
-        owner_id = None
-        
+
+        existing_owner = matches.get('phone')
         if owner_type == "existing":
-            # Find existing owner by phone number
-            cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE PhoneNUMB = %s", (phone_number,))
-            existing_owner = _safe_fetchone()
-            if existing_owner:
-                owner_id = existing_owner['Owner_ID']
-                logger.info("Found existing owner ID: %s", owner_id)
-            else:
-                # ROLLBACK IF WE STARTED TRANSACTION
-                try:
-                    if conn.in_transaction:
-                        conn.rollback()
-                except:
-                    pass
+            if not existing_owner:
                 return jsonify({"status": "error", "message": "No existing owner found with this phone number"}), 404
-                
         else:  # new owner
-            # ============================================
-            # DUPLICATE CHECK 3: Phone number for new owner
-            # ============================================
-            cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE PhoneNUMB = %s", (phone_number,))
-            existing_owner_by_phone = _safe_fetchone()
-            if existing_owner_by_phone:
-                # ROLLBACK IF WE STARTED TRANSACTION
-                try:
-                    if conn.in_transaction:
-                        conn.rollback()
-                except:
-                    pass
+            if existing_owner:
                 return jsonify({
                     "status": "error", 
-                    "message": f"Phone number already registered to owner: {existing_owner_by_phone['Owner_Name']} (ID: {existing_owner_by_phone['Owner_ID']})"
+                    "message": f"Phone number already registered to owner: {existing_owner['Owner_Name']} (ID: {existing_owner['Owner_ID']})"
                 }), 409
             
-            # ============================================
-            # DUPLICATE CHECK 4: Email for new owner (if provided)
-            # ============================================
-            if owner_email:
-                cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE Owner_Email = %s", (owner_email,))
-                existing_owner_by_email = _safe_fetchone()
-                if existing_owner_by_email:
-                    # ROLLBACK IF WE STARTED TRANSACTION
-                    try:
-                        if conn.in_transaction:
-                            conn.rollback()
-                    except:
-                        pass
+            existing_owner_by_email = matches.get('email')
+            if existing_owner_by_email:
+                return jsonify({
+                    "status": "error", 
+                    "message": f"Email already registered to owner: {existing_owner_by_email['Owner_Name']} (ID: {existing_owner_by_email['Owner_ID']})"
+                }), 409
+        
+        owner_id = None
+        
+        # Owner and car rows are written together or not at all
+        with transaction(conn):
+            if owner_type == "existing":
+                owner_id = existing_owner['Owner_ID']
+                logger.info("Found existing owner ID: %s", owner_id)
+            else:  # new owner
+                owner_id, created = _insert_owner(cursor, owner_name, owner_email, phone_number)
+                if not created:
+                    conn.rollback()
                     return jsonify({
-                        "status": "error", 
-                        "message": f"Email already registered to owner: {existing_owner_by_email['Owner_Name']} (ID: {existing_owner_by_email['Owner_ID']})"
+                        "status": "error",
+                        "message": f"Phone number already registered to owner ID: {owner_id}"
                     }), 409
+                logger.info("Created new owner ID: %s", owner_id)
             
-            # Create new owner
-            cursor.execute("""
-                INSERT INTO owner (Owner_Name, Owner_Email, PhoneNUMB)
-                VALUES (%s, %s, %s)
-            """, (owner_name, owner_email, phone_number))
-            owner_id = cursor.lastrowid
-            logger.info("Created new owner ID: %s", owner_id)
-        
-        # NEW FEATURE: Calculate next oil change date if not provided
-        auto_calculated = False
-        if next_oil_change is None or (isinstance(next_oil_change, str) and next_oil_change.strip() == ''):
-            # User didn't provide a date, so we auto-calculate
-            base_date = None
-            if last_service_date:
-                try:
-                    base_date = datetime.strptime(last_service_date, '%Y-%m-%d').date()
-                except Exception:
-                    base_date = datetime.now().date()
-            else:
-                base_date = datetime.now().date()
-            
-            next_oil_change = add_months(base_date, 3)
-            auto_calculated = True
-            logger.info(f"Auto-calculated next oil change: {next_oil_change} (+3 months from {base_date})")
-        else:
-            # User provided a date, ensure it's valid
+            # Add the car; the primary key catches a plate registered since the duplicate check
             try:
-                datetime.strptime(next_oil_change, '%Y-%m-%d')
-            except ValueError:
-                # ROLLBACK IF WE STARTED TRANSACTION
-                try:
-                    if conn.in_transaction:
-                        conn.rollback()
-                except:
-                    pass
-                return jsonify({"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}), 400
-        
-        # Add the car
-        cursor.execute("""
-            INSERT INTO car (Car_plate, Model, Year, VIN, Next_Oil_Change, Owner_ID)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (car_plate, model, year, vin, next_oil_change, owner_id))
+                cursor.execute("""
+                    INSERT INTO car (Car_plate, Model, Year, VIN, Next_Oil_Change, Owner_ID)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (car_plate, model, year, vin, next_oil_change, owner_id))
+            except IntegrityError as e:
+                if e.errno != _DUPLICATE_ENTRY:
+                    raise
+                conn.rollback()
+                return jsonify({"status": "error", "message": f"Car with plate {car_plate} already exists"}), 409
         
         # ============================================
         # CRITICAL CHANGE: DO NOT CREATE SERVICE HISTORY RECORD
@@ -898,22 +962,6 @@ def add_car():
         #         logger.info("Created initial service history record #%s", history_id)
         # ============================================
         
-        # COMMIT ONLY IF WE STARTED TRANSACTION
-        try:
-            if conn.in_transaction:
-                conn.commit()
-                logger.info("Transaction committed successfully")
-            else:
-                # Connection is already autocommit or in managed transaction
-                conn.commit()
-        except Exception as commit_error:
-            logger.warning(f"Commit handling: {commit_error}")
-            try:
-                if not conn.autocommit:
-                    conn.commit()
-            except:
-                pass
-        
         # Clear the stored plate from session
         session.pop('detected_plate', None)
         
@@ -936,14 +984,6 @@ def add_car():
         })
         
     except Exception as e:
-        # ROLLBACK ON ERROR
-        try:
-            if conn and conn.in_transaction:
-                conn.rollback()
-                logger.info("Transaction rolled back due to error")
-        except:
-            pass
-        
         logger.error(f"Error adding car: {e}", exc_info=True)
         return jsonify({
             "status": "error",
@@ -983,11 +1023,12 @@ def store_plate():
         }), 500
 
 @mechanic_bp.route("/api/stored-plate", methods=["GET"])
+@session_read_only
 @mechanic_login_required
 def get_stored_plate():
     """Get stored plate from session"""
     plate_number = session.get('detected_plate', '')
-    return jsonify({
+    return _revalidated_json({
         "plate": plate_number,
         "has_plate": bool(plate_number)
     })
@@ -1008,17 +1049,22 @@ def check_owner_exists(phone_number):
     conn = None
     cursor = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT Owner_ID, Owner_Name, Owner_Email FROM owner WHERE PhoneNUMB = %s", (phone_number,))
-        owner = cursor.fetchone()
+        payload = _OWNER_LOOKUP_CACHE.get(phone_number)
+        if payload is None:
+            conn = get_connection()
+            cursor = conn.cursor(dictionary=True)
+            
+            cursor.execute("SELECT Owner_ID, Owner_Name, Owner_Email FROM owner WHERE PhoneNUMB = %s", (phone_number,))
+            owner = cursor.fetchone()
+            
+            payload = {
+                "success": True,
+                "exists": owner is not None,
+                "owner": owner
+            }
+            _OWNER_LOOKUP_CACHE.set(phone_number, payload)
         
-        return jsonify({
-            "success": True,
-            "exists": owner is not None,
-            "owner": owner
-        })
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Error checking owner: {e}")
@@ -1055,7 +1101,7 @@ def add_owner():
         return jsonify({"success": False, "message": "Owner name is too long (max 100 characters)"}), 400
     
     # Check for malicious input in name
-    if re.search(r'[<>{}[\];]', owner_name):
+    if not _UNSAFE_NAME_CHARS.isdisjoint(owner_name):
         return jsonify({"success": False, "message": "Owner name contains invalid characters"}), 400
     
     # Phone number validation
@@ -1063,7 +1109,7 @@ def add_owner():
         return jsonify({"success": False, "message": "Phone number is required"}), 400
     
     # Clean phone number (remove spaces, dashes, parentheses)
-    phone_clean = re.sub(r'[+\s\-()]', '', phone_number)
+    phone_clean = phone_number.translate(_PHONE_STRIP_TABLE)
     
     if len(phone_clean) < 8:
         return jsonify({"success": False, "message": "Phone number is too short (minimum 8 digits)"}), 400
@@ -1071,7 +1117,7 @@ def add_owner():
     if len(phone_clean) > 20:
         return jsonify({"success": False, "message": "Phone number is too long (max 20 characters)"}), 400
     
-    if not phone_clean.isdigit() and not phone_clean.startswith('+'):
+    if not phone_clean.isdigit():
         return jsonify({"success": False, "message": "Phone number should contain only digits and optional '+' prefix"}), 400
     
     # Email validation (optional)
@@ -1080,10 +1126,53 @@ def add_owner():
             return jsonify({"success": False, "message": "Email address is too long"}), 400
         
         # Basic email format validation
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, owner_email):
+        if not _EMAIL_RE.match(owner_email):
             return jsonify({"success": False, "message": "Invalid email format. Please use a valid email address"}), 400
     
+    # Optional car data is validated before touching the database
+    car_plate = None
+    vin = None
+    if car_data and isinstance(car_data, dict):
+        car_plate = car_data.get('car_plate', '').strip().upper()
+        model = car_data.get('model', '').strip()
+        year = car_data.get('year')
+        vin = car_data.get('vin', '').strip().upper()
+        
+        if car_plate:
+            # Validate car plate format
+            if not _PLATE_RE.match(car_plate):
+                return jsonify({
+                    "success": False, 
+                    "message": "Valid license plate is required (1 letter followed by 1-6 digits)"
+                }), 400
+            
+            # VIN validation if provided
+            if vin and len(vin) != 17:
+                return jsonify({
+                    "success": False, 
+                    "message": "VIN must be exactly 17 characters"
+                }), 400
+            
+            # Model validation
+            if not model:
+                return jsonify({"success": False, "message": "Car model is required when adding a car"}), 400
+            
+            if len(model) > 50:
+                return jsonify({"success": False, "message": "Car model name is too long (max 50 characters)"}), 400
+            
+            # Year validation
+            try:
+                if year:
+                    year = int(year)
+                    current_year = datetime.now().year
+                    if year < 1900 or year > current_year + 1:
+                        return jsonify({
+                            "success": False, 
+                            "message": f"Year must be between 1900 and {current_year + 1}"
+                        }), 400
+            except (ValueError, TypeError):
+                return jsonify({"success": False, "message": "Year must be a valid number"}), 400
+    
     conn = None
     cursor = None
     try:
@@ -1091,123 +1180,75 @@ def add_owner():
         cursor = conn.cursor(dictionary=True)
         
         # ============================================
-        # DUPLICATE CHECK 1: Phone number
+        # DUPLICATE CHECKS: phone, email, plate and VIN in one round-trip
         # ============================================
-        cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE PhoneNUMB = %s", (phone_number,))
-        existing_owner_by_phone = cursor.fetchone()
+        cursor.execute(_REGISTRATION_DUPLICATES_SQL, (
+            car_plate or None,
+            vin if car_plate and vin else None,
+            phone_number,
+            owner_email or None
+        ))
+        matches = {}
+        for row in cursor.fetchall():
+            matches.setdefault(row['conflict'], row)
+        
+        existing_owner_by_phone = matches.get('phone')
         if existing_owner_by_phone:
             return jsonify({
                 "success": False, 
                 "message": f"Phone number already registered to owner: {existing_owner_by_phone['Owner_Name']} (ID: {existing_owner_by_phone['Owner_ID']})"
             }), 409
         
-        # ============================================
-        # DUPLICATE CHECK 2: Email (if provided)
-        # ============================================
-        if owner_email:
-            cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE Owner_Email = %s", (owner_email,))
-            existing_owner_by_email = cursor.fetchone()
-            if existing_owner_by_email:
-                return jsonify({
-                    "success": False, 
-                    "message": f"Email already registered to owner: {existing_owner_by_email['Owner_Name']} (ID: {existing_owner_by_email['Owner_ID']})"
-                }), 409
+        existing_owner_by_email = matches.get('email')
+        if existing_owner_by_email:
+            return jsonify({
+                "success": False, 
+                "message": f"Email already registered to owner: {existing_owner_by_email['Owner_Name']} (ID: {existing_owner_by_email['Owner_ID']})"
+            }), 409
+        
+        existing_car = matches.get('plate')
+        if existing_car:
+            owner_name_msg = existing_car['Owner_Name'] or 'Unknown'
+            return jsonify({
+                "success": False, 
+                "message": f"Car with plate {car_plate} already exists (Owner: {owner_name_msg})"
+            }), 409
+        
+        existing_vin = matches.get('vin')
+        if existing_vin:
+            owner_name_msg = existing_vin['Owner_Name'] or 'Unknown'
+            return jsonify({
+                "success": False, 
+                "message": f"VIN {vin} already registered to car: {existing_vin['Car_plate']} (Owner: {owner_name_msg})"
+            }), 409
         
         # ============================================
-        # Create new owner
+        # Create new owner; unique keys catch registrations made since the checks
         # ============================================
-        cursor.execute("""
-            INSERT INTO owner (Owner_Name, Owner_Email, PhoneNUMB)
-            VALUES (%s, %s, %s)
-        """, (owner_name, owner_email if owner_email else None, phone_number))
-        
-        owner_id = cursor.lastrowid
+        owner_id, created = _insert_owner(cursor, owner_name, owner_email if owner_email else None, phone_number)
+        if not created:
+            conn.rollback()
+            return jsonify({
+                "success": False,
+                "message": f"Phone number already registered to owner ID: {owner_id}"
+            }), 409
         
         # If car data is provided, add car as well
         car_added = False
-        car_plate = None
-        
-        if car_data and isinstance(car_data, dict):
-            car_plate = car_data.get('car_plate', '').strip().upper()
-            model = car_data.get('model', '').strip()
-            year = car_data.get('year')
-            vin = car_data.get('vin', '').strip().upper()
-            
-            # Validate car data if provided
-            if car_plate:
-                # Validate car plate format
-                if not re.match(r'^[A-Z]{1}[0-9]{1,6}$', car_plate):
-                    return jsonify({
-                        "success": False, 
-                        "message": "Valid license plate is required (1 letter followed by 1-6 digits)"
-                    }), 400
-                
-                # ============================================
-                # DUPLICATE CHECK 3: Car plate
-                # ============================================
-                cursor.execute("SELECT Car_plate, Owner_ID FROM car WHERE Car_plate = %s", (car_plate,))
-                existing_car = cursor.fetchone()
-                if existing_car:
-                    # Get owner name for better error message
-                    cursor.execute("SELECT Owner_Name FROM owner WHERE Owner_ID = %s", (existing_car['Owner_ID'],))
-                    existing_owner = cursor.fetchone()
-                    owner_name_msg = existing_owner['Owner_Name'] if existing_owner else 'Unknown'
-                    return jsonify({
-                        "success": False, 
-                        "message": f"Car with plate {car_plate} already exists (Owner: {owner_name_msg})"
-                    }), 409
-                
-                # VIN validation if provided
-                if vin:
-                    if len(vin) != 17:
-                        return jsonify({
-                            "success": False, 
-                            "message": "VIN must be exactly 17 characters"
-                        }), 400
-                    
-                    # ============================================
-                    # DUPLICATE CHECK 4: VIN
-                    # ============================================
-                    cursor.execute("SELECT Car_plate, Owner_ID FROM car WHERE VIN = %s", (vin,))
-                    existing_vin = cursor.fetchone()
-                    if existing_vin:
-                        # Get owner name for better error message
-                        cursor.execute("SELECT Owner_Name FROM owner WHERE Owner_ID = %s", (existing_vin['Owner_ID'],))
-                        existing_owner = cursor.fetchone()
-                        owner_name_msg = existing_owner['Owner_Name'] if existing_owner else 'Unknown'
-                        return jsonify({
-                            "success": False, 
-                            "message": f"VIN {vin} already registered to car: {existing_vin['Car_plate']} (Owner: {owner_name_msg})"
-                        }), 409
-                
-                # Model validation
-                if not model:
-                    return jsonify({"success": False, "message": "Car model is required when adding a car"}), 400
-                
-                if len(model) > 50:
-                    return jsonify({"success": False, "message": "Car model name is too long (max 50 characters)"}), 400
-                
-                # Year validation
-                try:
-                    if year:
-                        year = int(year)
-                        current_year = datetime.now().year
-                        if year < 1900 or year > current_year + 1:
-                            return jsonify({
-                                "success": False, 
-                                "message": f"Year must be between 1900 and {current_year + 1}"
-                            }), 400
-                except (ValueError, TypeError):
-                    return jsonify({"success": False, "message": "Year must be a valid number"}), 400
-                
-                # Insert car
+        if car_plate:
+            try:
                 cursor.execute("""
                     INSERT INTO car (Car_plate, Model, Year, VIN, Next_Oil_Change, Owner_ID)
                     VALUES (%s, %s, %s, %s, %s, %s)
                 """, (car_plate, model, year if year else None, vin if vin else None, None, owner_id))
-                
-                car_added = True
-                logger.info(f"Car {car_plate} added with new owner {owner_name}")
+            except IntegrityError as e:
+                if e.errno != _DUPLICATE_ENTRY:
+                    raise
+                conn.rollback()
+                return jsonify({"success": False, "message": f"Car with plate {car_plate} already exists"}), 409
+            
+            car_added = True
+            logger.info(f"Car {car_plate} added with new owner {owner_name}")
         
         conn.commit()
         
@@ -1259,8 +1300,16 @@ def delete_owner(owner_id):
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # First, get owner name for logging/messages
-        cursor.execute("SELECT Owner_Name, PhoneNUMB FROM owner WHERE Owner_ID = %s", (owner_id,))
+        # Owner name (for logging/messages) plus car and admin counts in one round-trip
+        cursor.execute("""
+            SELECT 
+                o.Owner_Name,
+                o.PhoneNUMB,
+                (SELECT COUNT(*) FROM car c WHERE c.Owner_ID = o.Owner_ID) as car_count,
+                (SELECT COUNT(*) FROM admin a WHERE a.Owner_ID = o.Owner_ID) as admin_count
+            FROM owner o
+            WHERE o.Owner_ID = %s
+        """, (owner_id,))
         owner = cursor.fetchone()
         
         if not owner:
@@ -1271,14 +1320,8 @@ def delete_owner(owner_id):
         
         owner_name = owner['Owner_Name']
         phone_number = owner['PhoneNUMB']
-        
-        # Check how many cars this owner has
-        cursor.execute("SELECT COUNT(*) as car_count FROM car WHERE Owner_ID = %s", (owner_id,))
-        car_count = cursor.fetchone()['car_count']
-        
-        # Check if owner has admin accounts
-        cursor.execute("SELECT COUNT(*) as admin_count FROM admin WHERE Owner_ID = %s", (owner_id,))
-        admin_count = cursor.fetchone()['admin_count']
+        car_count = owner['car_count']
+        admin_count = owner['admin_count']
         
         if admin_count > 0:
             return jsonify({
@@ -1349,7 +1392,7 @@ def add_owner_without_car():
         return jsonify({"success": False, "message": "Phone number is required"}), 400
     
     # Clean and validate phone
-    phone_clean = re.sub(r'[+\s\-()]', '', phone_number)
+    phone_clean = phone_number.translate(_PHONE_STRIP_TABLE)
     if len(phone_clean) < 8:
         return jsonify({"success": False, "message": "Phone number is too short (minimum 8 digits)"}), 400
     
@@ -1361,8 +1404,7 @@ def add_owner_without_car():
         if len(owner_email) > 100:
             return jsonify({"success": False, "message": "Email address is too long"}), 400
         
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, owner_email):
+        if not _EMAIL_RE.match(owner_email):
             return jsonify({"success": False, "message": "Invalid email format"}), 400
     
     conn = None
@@ -1371,32 +1413,34 @@ def add_owner_without_car():
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Check if owner with same phone already exists
-        cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE PhoneNUMB = %s", (phone_number,))
-        existing_owner = cursor.fetchone()
+        # Phone and email conflicts in one round-trip
+        cursor.execute(_REGISTRATION_DUPLICATES_SQL, (None, None, phone_number, owner_email or None))
+        matches = {}
+        for row in cursor.fetchall():
+            matches.setdefault(row['conflict'], row)
+        
+        existing_owner = matches.get('phone')
         if existing_owner:
             return jsonify({
                 "success": False, 
                 "message": f"Phone number already registered to owner: {existing_owner['Owner_Name']} (ID: {existing_owner['Owner_ID']})"
             }), 409
         
-        # Check if owner with same email already exists (if email provided)
-        if owner_email:
-            cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE Owner_Email = %s", (owner_email,))
-            existing_email = cursor.fetchone()
-            if existing_email:
-                return jsonify({
-                    "success": False, 
-                    "message": f"Email already registered to owner: {existing_email['Owner_Name']} (ID: {existing_email['Owner_ID']})"
-                }), 409
-        
-        # Create new owner
-        cursor.execute("""
-            INSERT INTO owner (Owner_Name, Owner_Email, PhoneNUMB)
-            VALUES (%s, %s, %s)
-        """, (owner_name, owner_email if owner_email else None, phone_number))
+        existing_email = matches.get('email')
+        if existing_email:
+            return jsonify({
+                "success": False, 
+                "message": f"Email already registered to owner: {existing_email['Owner_Name']} (ID: {existing_email['Owner_ID']})"
+            }), 409
         
-        owner_id = cursor.lastrowid
+        # Create new owner; idx_owner_phone catches a registration made since the check
+        owner_id, created = _insert_owner(cursor, owner_name, owner_email if owner_email else None, phone_number)
+        if not created:
+            conn.rollback()
+            return jsonify({
+                "success": False,
+                "message": f"Phone number already registered to owner ID: {owner_id}"
+            }), 409
         conn.commit()
         
         logger.info(f"New owner added without car: {owner_name} (ID: {owner_id}) by {session.get('mechanic_username')}")
@@ -1429,32 +1473,39 @@ def add_owner_without_car():
 @mechanic_login_required
 def get_all_owners():
     """Get all owners with car counts"""
+    limit, offset = _list_page_args()
+    cache_key = ('owners', limit, offset)
+    cached = _LIST_PAGE_CACHE.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+    
     conn = None
     cursor = None
     try:
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("""
+        owners, has_more = _fetch_list_page(cursor, """
             SELECT 
                 o.Owner_ID, 
                 o.Owner_Name, 
                 o.Owner_Email, 
                 o.PhoneNUMB,
-                COUNT(c.Car_plate) as car_count
+                (SELECT COUNT(*) FROM car c WHERE c.Owner_ID = o.Owner_ID) as car_count
             FROM owner o
-            LEFT JOIN car c ON o.Owner_ID = c.Owner_ID
-            GROUP BY o.Owner_ID, o.Owner_Name, o.Owner_Email, o.PhoneNUMB
-            ORDER BY o.Owner_Name
-        """)
+            ORDER BY o.Owner_Name, o.Owner_ID
+        """, limit, offset)
         
-        owners = cursor.fetchall()
-        
-        return jsonify({
+        payload = {
             "success": True,
             "owners": owners,
-            "count": len(owners)
-        })
+            "count": len(owners),
+            "limit": limit,
+            "offset": offset,
+            "has_more": has_more
+        }
+        _LIST_PAGE_CACHE.set(cache_key, payload)
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Error getting all owners: {e}", exc_info=True)
@@ -1470,13 +1521,19 @@ def get_all_owners():
 @mechanic_login_required
 def get_ownerless_cars():
     """Get all cars that don't have an owner assigned"""
+    limit, offset = _list_page_args()
+    cache_key = ('ownerless_cars', limit, offset)
+    cached = _LIST_PAGE_CACHE.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+    
     conn = None
     cursor = None
     try:
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("""
+        cars, has_more = _fetch_list_page(cursor, """
             SELECT 
                 Car_plate, 
                 Model, 
@@ -1486,20 +1543,23 @@ def get_ownerless_cars():
             FROM car 
             WHERE Owner_ID IS NULL
             ORDER BY Car_plate
-        """)
-        
-        cars = cursor.fetchall()
+        """, limit, offset)
         
         # Format dates
         for car in cars:
             if car.get('Next_Oil_Change') and hasattr(car['Next_Oil_Change'], 'isoformat'):
                 car['Next_Oil_Change'] = car['Next_Oil_Change'].isoformat()
         
-        return jsonify({
+        payload = {
             "success": True,
             "cars": cars,
-            "count": len(cars)
-        })
+            "count": len(cars),
+            "limit": limit,
+            "offset": offset,
+            "has_more": has_more
+        }
+        _LIST_PAGE_CACHE.set(cache_key, payload)
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Error getting ownerless cars: {e}", exc_info=True)
@@ -1526,7 +1586,7 @@ def assign_car_to_owner():
     if not car_plate:
         return jsonify({"success": False, "message": "Car plate is required"}), 400
     
-    if not re.match(r'^[A-Z]{1}[0-9]{1,6}$', car_plate):
+    if not _PLATE_RE.match(car_plate):
         return jsonify({"success": False, "message": "Invalid car plate format"}), 400
     
     if not owner_id:
@@ -1546,8 +1606,17 @@ def assign_car_to_owner():
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Check if car exists
-        cursor.execute("SELECT Car_plate, Owner_ID FROM car WHERE Car_plate = %s", (car_plate,))
+        # Car, its current owner and the target owner in one round-trip
+        cursor.execute("""
+            SELECT c.Car_plate, c.Owner_ID,
+                   cur.Owner_Name AS current_owner_name,
+                   target.Owner_ID AS target_owner_id,
+                   target.Owner_Name AS target_owner_name
+            FROM car c
+            LEFT JOIN owner cur ON cur.Owner_ID = c.Owner_ID
+            LEFT JOIN owner target ON target.Owner_ID = %s
+            WHERE c.Car_plate = %s
+        """, (owner_id, car_plate))
         car = cursor.fetchone()
         
         if not car:
@@ -1556,23 +1625,14 @@ def assign_car_to_owner():
                 "message": f"Car with plate {car_plate} not found"
             }), 404
         
-        # Check if owner exists
-        cursor.execute("SELECT Owner_ID, Owner_Name FROM owner WHERE Owner_ID = %s", (owner_id,))
-        owner = cursor.fetchone()
-        
-        if not owner:
+        if car['target_owner_id'] is None:
             return jsonify({
                 "success": False,
                 "message": f"Owner with ID {owner_id} not found"
             }), 404
         
-        # Get current owner name if any
-        current_owner_name = "No owner (ownerless)"
-        if car['Owner_ID']:
-            cursor.execute("SELECT Owner_Name FROM owner WHERE Owner_ID = %s", (car['Owner_ID'],))
-            current_owner = cursor.fetchone()
-            if current_owner:
-                current_owner_name = current_owner['Owner_Name']
+        owner_name = car['target_owner_name']
+        current_owner_name = car['current_owner_name'] or "No owner (ownerless)"
         
         # Assign car to new owner
         cursor.execute("""
@@ -1583,14 +1643,14 @@ def assign_car_to_owner():
         
         conn.commit()
         
-        logger.info(f"Car {car_plate} reassigned from '{current_owner_name}' to '{owner['Owner_Name']}' (ID: {owner_id}) by {session.get('mechanic_username')}")
+        logger.info(f"Car {car_plate} reassigned from '{current_owner_name}' to '{owner_name}' (ID: {owner_id}) by {session.get('mechanic_username')}")
         
         return jsonify({
             "success": True,
-            "message": f"Car {car_plate} assigned to owner '{owner['Owner_Name']}'",
+            "message": f"Car {car_plate} assigned to owner '{owner_name}'",
             "car_plate": car_plate,
             "owner_id": owner_id,
-            "owner_name": owner['Owner_Name'],
+            "owner_name": owner_name,
             "previous_owner": current_owner_name
         })
         
@@ -1608,6 +1668,51 @@ def assign_car_to_owner():
 # VIN SEARCH ROUTES - MECHANIC SESSION ONLY
 # ===============================
 
+# VIN search results; both queries share the car + owner projection
+_VIN_SEARCH_SELECT = """
+    SELECT 
+        c.Car_plate AS plate_number,
+        c.Model AS model,
+        c.Year AS year,
+        c.VIN AS vin,
+        c.Next_Oil_Change AS next_oil_change,
+        o.Owner_Name AS owner_name,
+        o.Owner_Email AS owner_email,
+        o.PhoneNUMB AS owner_phone
+    FROM car c
+    LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
+"""
+
+# Exact match first, then other VINs starting with the query; a range scan on idx_car_vin
+_VIN_PREFIX_SEARCH_SQL = _VIN_SEARCH_SELECT + """
+    WHERE c.VIN LIKE CONCAT(%s, '%')
+    ORDER BY c.VIN = %s DESC, c.Car_plate
+    LIMIT %s
+"""
+
+# VINs containing the query elsewhere; only run when prefix matches don't fill the page
+_VIN_CONTAINS_SEARCH_SQL = _VIN_SEARCH_SELECT + """
+    WHERE c.VIN LIKE CONCAT('%', %s, '%')
+      AND c.VIN NOT LIKE CONCAT(%s, '%')
+    ORDER BY c.Car_plate
+    LIMIT %s
+"""
+
+
+def _search_cars_by_vin(cursor, vin_clean, limit):
+    """Cars whose VIN matches exactly, starts with, or contains vin_clean, in that order.
+
+    vin_clean must be alphanumeric so it carries no LIKE wildcards; VIN
+    comparisons rely on the column's case-insensitive collation.
+    """
+    cursor.execute(_VIN_PREFIX_SEARCH_SQL, (vin_clean, vin_clean, limit))
+    results = cursor.fetchall()
+    if len(results) < limit:
+        cursor.execute(_VIN_CONTAINS_SEARCH_SQL, (vin_clean, vin_clean, limit - len(results)))
+        results += cursor.fetchall()
+    return results
+
+
 @mechanic_bp.route('/api/search-by-vin', methods=['GET'])
 @mechanic_login_required
 def search_by_vin():
@@ -1623,29 +1728,7 @@ def search_by_vin():
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("""
-            SELECT 
-                c.Car_plate AS plate_number,
-                c.Model AS model,
-                c.Year AS year,
-                c.VIN AS vin,
-                c.Next_Oil_Change AS next_oil_change,
-                o.Owner_Name AS owner_name,
-                o.Owner_Email AS owner_email,
-                o.PhoneNUMB AS owner_phone
-            FROM car c
-            LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
-            WHERE UPPER(c.VIN) LIKE CONCAT('%', %s, '%')
-            ORDER BY
-                CASE
-                    WHEN UPPER(c.VIN) = %s THEN 1
-                    WHEN UPPER(c.VIN) LIKE CONCAT(%s, '%') THEN 2
-                    ELSE 3
-                END, c.Car_plate
-            LIMIT 10
-        """, (vin_clean, vin_clean, vin_clean))
-
-        results = cursor.fetchall()
+        results = _search_cars_by_vin(cursor, vin_clean, 10)
         if not results:
             return jsonify({"success": False, "message": "No cars found"}), 404
 
@@ -1692,30 +1775,7 @@ def search_by_vin_flexible():
         cursor = conn.cursor(dictionary=True)
 
         # FLEXIBLE SEARCH: Look for partial matches anywhere in VIN
-        cursor.execute("""
-            SELECT 
-                c.Car_plate as plate_number,
-                c.Model as model,
-                c.Year as year,
-                c.VIN as vin,
-                c.Next_Oil_Change as next_oil_change,
-                o.Owner_Name as owner_name,
-                o.Owner_Email as owner_email,
-                o.PhoneNUMB as owner_phone
-            FROM car c
-            LEFT JOIN owner o ON c.Owner_ID = o.Owner_ID
-            WHERE UPPER(c.VIN) LIKE UPPER(CONCAT('%', %s, '%'))
-            ORDER BY 
-                CASE 
-                    WHEN UPPER(c.VIN) = UPPER(%s) THEN 1  -- Exact match first
-                    WHEN UPPER(c.VIN) LIKE UPPER(CONCAT(%s, '%')) THEN 2  -- Starts with
-                    ELSE 3  -- Contains
-                END,
-                c.Car_plate
-            LIMIT 20
-        """, (vin_clean, vin_clean, vin_clean))
-
-        results = cursor.fetchall()
+        results = _search_cars_by_vin(cursor, vin_clean, 20)
 
         if results:
             logger.info("Found %s cars matching VIN pattern", len(results))
@@ -1863,7 +1923,7 @@ def after_service_form():
     plate_number = session.get('detected_plate', '').strip().upper()
     
     # Validate plate format
-    if not plate_number or not re.match(r'^[A-Z0-9]{4,12}$', plate_number):
+    if not plate_number or not _PLATE_LOOKUP_RE.match(plate_number):
         return render_template("error.html", 
                              message="Invalid or missing license plate"), 400
     
@@ -1920,7 +1980,7 @@ def submit_after_service():
         mechanic_notes = data.get('mechanic_notes', '')
         
         # Validate required fields - EXISTING CODE PRESERVED
-        if not plate_number or not re.match(r'^[A-Z0-9]{4,12}$', plate_number):
+        if not plate_number or not _PLATE_LOOKUP_RE.match(plate_number):
             return jsonify({"success": False, "message": "Invalid plate number"}), 400
         
         if not service_type:
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 import logging
 from utils.database import get_connection, _safe_close
+from utils.cache import clear_write_caches
 
 owner_bp = Blueprint('owners', __name__)
+owner_bp.after_request(clear_write_caches)
 
 @owner_bp.route("/owners", methods=["GET"])
 def get_owners():
@@ -6,6 +6,50 @@ Database setup script for ISD1 Appointment System
 import mysql.connector
 from config import DB_CONFIG
 
+# Indexes backing the hot lookup queries in the route handlers
+INDEXES_SQL = [
+    # Latest service history per car (MAX(History_ID) / ORDER BY History_ID DESC lookups)
+    "CREATE INDEX idx_sh_plate_history ON service_history (Car_plate, History_ID)",
+    # Dashboard date-range counts on services
+    "CREATE INDEX idx_sh_service_date ON service_history (Service_Date)",
+    # Appointments by day and the slot conflict check
+    "CREATE INDEX idx_appt_date_time ON appointment (Date, Time)",
+    # MAX(Mileage) per car resolves to a single index seek
+    "CREATE INDEX idx_sh_plate_mileage ON service_history (Car_plate, Mileage DESC)",
+    # Duplicate checks when registering cars and owners ('VIN-UNKNOWN' placeholders repeat)
+    "CREATE INDEX idx_car_vin ON car (VIN)",
+    "CREATE UNIQUE INDEX idx_owner_phone ON owner (PhoneNUMB)",
+    "CREATE INDEX idx_owner_email ON owner (Owner_Email)",
+    # Per-owner car counts and ownerless-car listings
+    "CREATE INDEX idx_car_owner ON car (Owner_ID)",
+    # Owners list pages in (Owner_Name, Owner_ID) order without a filesort
+    "CREATE INDEX idx_owner_name ON owner (Owner_Name, Owner_ID)",
+]
+
+# MySQL error codes that mean the index is already there or its table is not
+DUPLICATE_KEY_NAME = 1061
+NO_SUCH_TABLE = 1146
+# Existing rows violate a UNIQUE index
+DUPLICATE_ENTRY = 1062
+
+
+def create_indexes(cursor):
+    """Create performance indexes, skipping ones that already exist."""
+    for sql in INDEXES_SQL:
+        try:
+            cursor.execute(sql)
+            print(f"✅ {sql}")
+        except mysql.connector.Error as e:
+            if e.errno == DUPLICATE_KEY_NAME:
+                print(f"ℹ️ Index already exists: {sql}")
+            elif e.errno == NO_SUCH_TABLE:
+                print(f"⚠️ Skipping index, table missing: {sql}")
+            elif e.errno == DUPLICATE_ENTRY:
+                print(f"⚠️ Skipping unique index, duplicate rows must be merged first: {sql}")
+            else:
+                raise
+
+
 def setup_database():
     """Create database and tables if they don't exist."""
     try:
@@ -74,6 +118,8 @@ def setup_database():
             cursor.execute(sql)
             print(f"✅ Table {i}/5 created or already exists")
         
+        create_indexes(cursor)
+        
         # Insert default services
         services = [
             (1, 'Oil Change'),
@@ -0,0 +1,234 @@
+# test_car_routes.py
+import json
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from flask import Flask
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routes.car_routes import car_bp, _OWNER_ID_CACHE, _CAR_CHECK_CACHE
+from routes.mechanic_routes import mechanic_bp
+
+
+# ===============================
+# TEST FIXTURES
+# ===============================
+
+@pytest.fixture
+def app():
+    """Create a Flask app with the car and mechanic blueprints mounted as in app.py"""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SECRET_KEY'] = 'test-secret-key'
+    app.register_blueprint(car_bp, url_prefix="/api/car")
+    app.register_blueprint(mechanic_bp)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def mock_conn():
+    """Patch the car blueprint's connection factory and return (conn, cursor)"""
+    with patch('routes.car_routes.get_connection') as mock_get_conn:
+        conn = MagicMock()
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        mock_get_conn.return_value = conn
+        yield conn, cursor
+
+
+NEW_CAR = {
+    "car_plate": "ABC123",
+    "model": "Corolla",
+    "year": 2018,
+    "vin": "1HGBH41JXMN109186",
+    "owner_type": "existing",
+    "PhoneNUMB": "70123456",
+}
+
+
+# ===============================
+# ADD CAR TESTS
+# ===============================
+
+def test_add_car_cached_owner_deleted(client, mock_conn):
+    """A cached Owner_ID whose owner is gone is dropped instead of being attached to the car"""
+    conn, cursor = mock_conn
+    _OWNER_ID_CACHE.set("70123456", 42)
+    try:
+        cursor.fetchall.return_value = []  # plate/VIN are free
+        cursor.rowcount = 0                # guarded insert matched no owner
+        cursor.fetchone.return_value = None
+
+        response = client.post('/api/car/add', json=NEW_CAR)
+
+        assert response.status_code == 404
+        assert "70123456" not in _OWNER_ID_CACHE
+        guarded_sql, guarded_params = cursor.execute.call_args_list[1][0]
+        assert "WHERE Owner_ID = %s AND PhoneNUMB = %s" in guarded_sql
+        assert guarded_params[-2:] == (42, "70123456")
+        conn.commit.assert_not_called()
+    finally:
+        _OWNER_ID_CACHE.clear()
+
+
+def test_add_car_cached_owner_still_valid(client, mock_conn):
+    """A cached Owner_ID that still matches skips the owner lookup"""
+    conn, cursor = mock_conn
+    _OWNER_ID_CACHE.set("70123456", 42)
+    try:
+        cursor.fetchall.return_value = []
+        cursor.rowcount = 1
+
+        response = client.post('/api/car/add', json=NEW_CAR)
+
+        assert response.status_code == 201
+        assert response.get_json()["owner_id"] == 42
+        executed = [c[0][0] for c in cursor.execute.call_args_list]
+        assert not any("SELECT Owner_ID FROM owner WHERE PhoneNUMB" in sql for sql in executed)
+        conn.commit.assert_called_once()
+    finally:
+        _OWNER_ID_CACHE.clear()
+
+
+# ===============================
+# CACHE INVALIDATION TESTS
+# ===============================
+
+def test_mechanic_write_clears_car_check_cache(client, mock_conn):
+    """A car cached by check_car_exists is re-read right after a mechanic deletes its owner"""
+    conn, cursor = mock_conn
+    _CAR_CHECK_CACHE.set("ABC123", {"exists": True, "car": {"Car_plate": "ABC123", "Owner_ID": 1}})
+    with client.session_transaction() as sess:
+        sess['mechanic_logged_in'] = True
+
+    with patch('routes.mechanic_routes.get_connection') as mock_mech_conn:
+        mech_conn = MagicMock()
+        mech_cursor = MagicMock()
+        mech_conn.cursor.return_value = mech_cursor
+        mock_mech_conn.return_value = mech_conn
+        mech_cursor.fetchone.return_value = {
+            'Owner_Name': 'Test Owner', 'PhoneNUMB': '70123456', 'car_count': 1, 'admin_count': 0
+        }
+        assert client.delete('/mechanic/api/owner/1').status_code == 200
+
+    assert "ABC123" not in _CAR_CHECK_CACHE
+    cursor.fetchone.return_value = {"Car_plate": "ABC123", "Owner_ID": None}
+    response = client.get('/api/car/check/ABC123')
+
+    assert response.get_json()["car"]["Owner_ID"] is None
+    cursor.execute.assert_called_once()
+    _CAR_CHECK_CACHE.clear()
+
+
+def test_failed_write_keeps_car_check_cache(client, mock_conn):
+    """Rejected writes leave cached lookups alone"""
+    _CAR_CHECK_CACHE.set("ABC123", {"exists": True})
+    try:
+        response = client.post('/api/car/add', json={})
+
+        assert response.status_code == 400
+        assert "ABC123" in _CAR_CHECK_CACHE
+    finally:
+        _CAR_CHECK_CACHE.clear()
+
+
+# ===============================
+# CAR LIST TESTS
+# ===============================
+
+CAR_ROWS = [
+    {"plate_number": "ABC123", "model": "Corolla", "year": 2018, "vin": "1HGBH41JXMN109186",
+     "next_oil_change": None, "owner_name": "John Doe", "owner_email": None, "owner_phone": "70123456"},
+    {"plate_number": "XYZ789", "model": "Civic", "year": 2020, "vin": "2HGBH41JXMN109187",
+     "next_oil_change": None, "owner_name": None, "owner_email": None, "owner_phone": None},
+]
+
+
+def test_get_all_cars_streams_rows(client, mock_conn):
+    """Rows are streamed into one JSON document and the cursor is closed afterwards"""
+    conn, cursor = mock_conn
+    cursor.__iter__.return_value = iter(CAR_ROWS)
+
+    response = client.get('/api/car/cars')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert json.loads(response.data) == {"success": True, "cars": CAR_ROWS, "count": 2}
+    sql, params = cursor.execute.call_args[0]
+    assert "LIMIT" not in sql
+    assert params == ()
+    conn.cursor.assert_called_once_with(dictionary=True, buffered=False)
+    cursor.close.assert_called_once()
+
+
+def test_get_all_cars_empty(client, mock_conn):
+    conn, cursor = mock_conn
+    cursor.__iter__.return_value = iter([])
+
+    response = client.get('/api/car/cars')
+
+    assert json.loads(response.data) == {"success": True, "cars": [], "count": 0}
+
+
+@pytest.mark.parametrize("query, params", [
+    ("?limit=2&offset=4", (2, 4)),
+    ("?limit=2", (2, 0)),
+    ("?limit=-1&offset=-5", (0, 0)),
+])
+def test_get_all_cars_limit_offset(client, mock_conn, query, params):
+    """limit switches on LIMIT/OFFSET; negative values are clamped to zero"""
+    conn, cursor = mock_conn
+    cursor.__iter__.return_value = iter([])
+
+    client.get('/api/car/cars' + query)
+
+    sql, bound = cursor.execute.call_args[0]
+    assert sql.rstrip().endswith("LIMIT %s OFFSET %s")
+    assert bound == params
+
+
+def test_get_all_cars_query_error(client, mock_conn):
+    conn, cursor = mock_conn
+    cursor.execute.side_effect = Exception("connection lost")
+
+    response = client.get('/api/car/cars')
+
+    assert response.status_code == 500
+    assert response.get_json()["success"] is False
+
+
+# ===============================
+# PLATE VALIDATION TESTS
+# ===============================
+
+@pytest.mark.parametrize("plate", ["ABC", "ABC12345X", "AB-123", "AB%20123"])
+def test_malformed_plate_keeps_status_codes(client, mock_conn, plate):
+    """Malformed plates are rejected by the handlers: check answers exists=false, car info answers 400"""
+    conn, cursor = mock_conn
+
+    check = client.get(f'/api/car/check/{plate}')
+    info = client.get(f'/api/car/api/car/{plate}')
+
+    assert check.status_code == 200
+    assert check.get_json() == {'exists': False, 'message': 'Invalid plate format'}
+    assert info.status_code == 400
+    assert info.get_json()['status'] == 'error'
+    cursor.execute.assert_not_called()
+
+
+def test_lowercase_plate_is_matched_and_uppercased(client, mock_conn):
+    conn, cursor = mock_conn
+    cursor.fetchone.return_value = None
+
+    response = client.get('/api/car/check/abc123')
+
+    assert response.status_code == 200
+    assert response.get_json()["exists"] is False
+    assert cursor.execute.call_args[0][1] == ("ABC123",)
@@ -0,0 +1,116 @@
+# test_detection_routes.py
+import pytest
+import contextlib
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+import routes.detection_routes as detection_routes
+from routes.detection_routes import read_plates_batched, OCR_ENHANCED_KWARGS, OCR_RAW_KWARGS
+
+
+class FakeReader:
+    """Stands in for easyocr.Reader; output depends on the exact pixels it is given"""
+
+    def __init__(self):
+        self.batched_shapes = []
+
+    def readtext(self, image, **kwargs):
+        h, w = image.shape[:2]
+        text = f"{h}X{w}S{int(image.sum())}W{kwargs.get('width_ths')}"
+        return [([[0, 0], [w, 0], [w, h], [0, h]], text, 0.9)]
+
+    def readtext_batched(self, images, batch_size=1, **kwargs):
+        # the real batched detector requires every image in the batch to share a shape
+        assert len({image.shape for image in images}) == 1
+        self.batched_shapes.append(images[0].shape)
+        return [self.readtext(image, **kwargs) for image in images]
+
+
+@pytest.fixture
+def reader():
+    fake = FakeReader()
+    with patch.object(detection_routes, "ocr_reader", fake):
+        yield fake
+
+
+def _crop(h, w, value):
+    return np.full((h, w), value, np.uint8)
+
+
+def test_read_plates_batched_matches_per_crop_readtext(reader):
+    """Mixed-size crops read the same as per-crop readtext calls, in input order"""
+    crops = [_crop(40, 120, 10), _crop(60, 200, 20), _crop(40, 120, 30), _crop(35, 90, 40)]
+
+    results = read_plates_batched(crops, **OCR_ENHANCED_KWARGS)
+
+    assert results == [reader.readtext(crop, **OCR_ENHANCED_KWARGS) for crop in crops]
+    assert reader.batched_shapes == [(40, 120)]
+
+
+def test_read_plates_batched_passes_raw_settings(reader):
+    """The raw-crop fallback keeps its own width_ths"""
+    results = read_plates_batched([_crop(40, 120, 10)], **OCR_RAW_KWARGS)
+
+    assert results[0][0][1].endswith("W0.5")
+
+
+def test_read_plates_batched_failed_group_is_empty(reader):
+    """A failing OCR group yields empty results without dropping the others"""
+    crops = [_crop(40, 120, 10), _crop(40, 120, 20), _crop(60, 200, 30)]
+    with patch.object(reader, "readtext_batched", side_effect=RuntimeError("boom")):
+        results = read_plates_batched(crops, **OCR_ENHANCED_KWARGS)
+
+    assert results[:2] == [[], []]
+    assert results[2] == reader.readtext(crops[2], **OCR_ENHANCED_KWARGS)
+
+
+class AutocastTorch:
+    """Minimal torch stand-in that records whether an FP16 autocast region is active"""
+
+    float16 = "float16"
+
+    def __init__(self):
+        self.fp16_active = False
+
+    @contextlib.contextmanager
+    def autocast(self, device_type, dtype=None):
+        self.fp16_active = dtype == self.float16
+        try:
+            yield
+        finally:
+            self.fp16_active = False
+
+
+class CraftLikeReader(FakeReader):
+    """Thresholds its detector score map with OpenCV the way EasyOCR's getDetBoxes does"""
+
+    def __init__(self, fake_torch):
+        super().__init__()
+        self.fake_torch = fake_torch
+
+    def readtext(self, image, **kwargs):
+        dtype = np.float16 if self.fake_torch.fp16_active else np.float32
+        score_map = np.full(image.shape[:2], 0.9, dtype)
+        cv2.threshold(score_map, 0.4, 1, cv2.THRESH_BINARY)
+        return super().readtext(image, **kwargs)
+
+
+def test_read_plates_batched_keeps_detector_in_fp32():
+    """On CUDA hosts EasyOCR must not run under FP16 autocast: OpenCV rejects float16 score maps"""
+    fake_torch = AutocastTorch()
+    reader = CraftLikeReader(fake_torch)
+    crops = [_crop(40, 120, 10), _crop(40, 120, 20), _crop(60, 200, 30)]
+
+    with patch.object(detection_routes, "ocr_reader", reader), \
+            patch.object(detection_routes, "torch", fake_torch), \
+            patch.object(detection_routes, "USE_HALF", True):
+        results = read_plates_batched(crops, **OCR_ENHANCED_KWARGS)
+
+    assert all(results)
+    assert results == [FakeReader().readtext(crop, **OCR_ENHANCED_KWARGS) for crop in crops]
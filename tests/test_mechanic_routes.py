@@ -347,16 +347,9 @@ def test_get_recent_activity_with_pagination(mock_get_connection, authenticated_
     mock_get_connection.return_value = mock_conn
     mock_conn.cursor.return_value = mock_cursor
     
+    # kind, id, timestamp, appointment time, plate, mileage, notes, icon kind, model, owner
     mock_activities = [
-        {
-            'History_ID': 1,
-            'timestamp': '2024-01-15 10:00:00',
-            'plate': 'ABC123',
-            'description': 'Oil change',
-            'mileage': 50000,
-            'car_model': 'Toyota',
-            'owner_name': 'John Doe'
-        }
+        ('service', 1, '2024-01-15 10:00:00', None, 'ABC123', 50000, 'Oil change', 'oil', 'Toyota', 'John Doe')
     ]
     mock_cursor.fetchall.return_value = mock_activities
     
@@ -382,6 +375,50 @@ def test_get_recent_activity_invalid_pagination(mock_get_connection, authenticat
     assert response.json['success'] == True
 
 
+@patch('routes.mechanic_routes.get_connection')
+def test_get_recent_activity_keyset_cursor(mock_get_connection, authenticated_session):
+    """A next_cursor from one page selects the keyset query with all 10 parameters bound in order"""
+    from routes.mechanic_routes import _RECENT_ACTIVITY_AFTER_CURSOR_SQL
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        ('service', 41, '2024-01-14', None, 'ABC123', 50000, 'Oil change', 'oil', 'Toyota', 'John Doe'),
+        ('appointment', 7, '2030-01-01', '09:30', 'XYZ789', None, None, None, None, None),
+        ('service', 40, '2024-01-12', None, 'XYZ789', 42000, 'Brakes', 'brake', 'Honda', None),
+    ]
+
+    response = authenticated_session.get('/mechanic/api/recent-activity?limit=3&cursor=2024-01-15|42')
+
+    sql, params = mock_cursor.execute.call_args[0]
+    assert sql == _RECENT_ACTIVITY_AFTER_CURSOR_SQL
+    assert params == ('2024-01-15', '2024-01-15', 42, 3, 3, '2024-01-15', '2024-01-15', 42, 4, 3)
+    assert sql.count('%s') == len(params)
+    # The cursor points at the last service on the page, skipping appointments
+    assert response.json['next_cursor'] == '2024-01-12|40'
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_get_recent_activity_malformed_cursor(mock_get_connection, authenticated_session):
+    """A cursor that does not parse falls back to the first offset page"""
+    from routes.mechanic_routes import _RECENT_ACTIVITY_SQL
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+
+    response = authenticated_session.get("/mechanic/api/recent-activity?limit=5&cursor=2024-01-15|42' OR 1=1")
+
+    assert response.status_code == 200
+    sql, params = mock_cursor.execute.call_args[0]
+    assert sql == _RECENT_ACTIVITY_SQL
+    assert params == (5, 0, 5, 4, 5)
+    assert sql.count('%s') == len(params)
+    assert response.json['next_cursor'] is None
+
+
 # ===============================
 # CAR INFO API TESTS
 # ===============================
@@ -441,7 +478,7 @@ def test_get_car_latest_mileage_authenticated(mock_get_connection, authenticated
     mock_get_connection.return_value = mock_conn
     mock_conn.cursor.return_value = mock_cursor
     
-    mock_result = {'max_mileage': 75000}
+    mock_result = (75000,)
     mock_cursor.fetchone.return_value = mock_result
     
     response = authenticated_session.get('/mechanic/api/car/ABC123/latest-mileage')
@@ -467,6 +504,46 @@ def test_get_car_latest_mileage_not_found(mock_get_connection, authenticated_ses
     assert response.json['max_mileage'] == 0
 
 
+@patch('routes.mechanic_routes.get_connection')
+def test_get_car_latest_mileage_not_modified(mock_get_connection, authenticated_session):
+    """A poll sending the last ETag gets 304 with an empty body"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (64000,)
+
+    first = authenticated_session.get('/mechanic/api/car/ETAG123/latest-mileage')
+    etag = first.headers['ETag']
+    second = authenticated_session.get('/mechanic/api/car/ETAG123/latest-mileage',
+                                       headers={'If-None-Match': etag})
+
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_get_stored_plate_not_modified_until_plate_changes(authenticated_session):
+    """The stored-plate poll returns 304 while the plate is unchanged and 200 once it changes"""
+    with authenticated_session.session_transaction() as sess:
+        sess['detected_plate'] = 'A12345'
+
+    etag = authenticated_session.get('/mechanic/api/stored-plate').headers['ETag']
+    unchanged = authenticated_session.get('/mechanic/api/stored-plate', headers={'If-None-Match': etag})
+
+    assert unchanged.status_code == 304
+    assert unchanged.data == b''
+
+    with authenticated_session.session_transaction() as sess:
+        sess['detected_plate'] = 'B67890'
+    changed = authenticated_session.get('/mechanic/api/stored-plate', headers={'If-None-Match': etag})
+
+    assert changed.status_code == 200
+    assert changed.json['plate'] == 'B67890'
+
+
 @patch('routes.mechanic_routes.get_connection')
 def test_update_car_maintenance_authenticated(mock_get_connection, authenticated_session):
     """Test update car maintenance API"""
@@ -642,6 +719,65 @@ def test_add_owner_without_car_authenticated(mock_get_connection, authenticated_
     assert response.status_code in [200, 400, 409]
 
 
+@pytest.mark.parametrize("rowcount, created", [(1, True), (0, False), (2, False)])
+def test_insert_owner_created_flag(rowcount, created):
+    """1 row affected is a new owner; 0 or 2 mean ON DUPLICATE KEY matched an existing phone"""
+    from routes.mechanic_routes import _insert_owner
+    mock_cursor = MagicMock()
+    mock_cursor.lastrowid = 77
+    mock_cursor.rowcount = rowcount
+
+    assert _insert_owner(mock_cursor, 'Jane Doe', None, '+961987654') == (77, created)
+    assert 'ON DUPLICATE KEY UPDATE Owner_ID = LAST_INSERT_ID(Owner_ID)' in mock_cursor.execute.call_args[0][0]
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_add_owner_without_car_phone_registered_concurrently(mock_get_connection, authenticated_session):
+    """A phone registered between the duplicate check and the insert returns 409 with the existing ID"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+    mock_cursor.lastrowid = 12
+    mock_cursor.rowcount = 0
+
+    response = authenticated_session.post('/mechanic/api/owner-without-car', json={
+        'owner_name': 'Bob Smith',
+        'phone_number': '+961555555'
+    })
+
+    assert response.status_code == 409
+    assert 'owner ID: 12' in response.json['message']
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_add_owner_car_plate_registered_concurrently(mock_get_connection, authenticated_session):
+    """A duplicate-key error on add_owner's car insert rolls back the new owner and returns 409"""
+    from mysql.connector import IntegrityError
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+    mock_cursor.lastrowid = 13
+    mock_cursor.rowcount = 1
+    mock_cursor.execute.side_effect = [None, None, IntegrityError("Duplicate entry 'A12345'", errno=1062)]
+
+    response = authenticated_session.post('/mechanic/api/owner', json={
+        'owner_name': 'Jane Doe',
+        'phone_number': '+961987654',
+        'car': {'car_plate': 'A12345', 'model': 'Corolla', 'year': 2018}
+    })
+
+    assert response.status_code == 409
+    assert 'A12345 already exists' in response.json['message']
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+
+
 @patch('routes.mechanic_routes.get_connection')
 def test_get_all_owners_authenticated(mock_get_connection, authenticated_session):
     """Test get all owners API"""
@@ -667,6 +803,75 @@ def test_get_all_owners_authenticated(mock_get_connection, authenticated_session
     assert len(response.json['owners']) == 1
 
 
+@patch('routes.mechanic_routes.get_connection')
+def test_get_all_owners_paginated(mock_get_connection, authenticated_session):
+    """Test all owners API returns one page and flags further pages"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    
+    mock_cursor.fetchall.return_value = [
+        {'Owner_ID': i, 'Owner_Name': f'Owner {i}', 'Owner_Email': None, 'PhoneNUMB': str(i), 'car_count': 0}
+        for i in range(3)
+    ]
+    
+    response = authenticated_session.get('/mechanic/api/all-owners?limit=2&offset=4')
+    assert response.status_code == 200
+    assert len(response.json['owners']) == 2
+    assert response.json['has_more'] == True
+    assert mock_cursor.execute.call_args[0][1] == (3, 4)
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_get_all_owners_unpaginated_by_default(mock_get_connection, authenticated_session):
+    """Test all owners API without ?limit= returns every row, not just the first page"""
+    from routes.mechanic_routes import _LIST_PAGE_CACHE
+    _LIST_PAGE_CACHE.clear()
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    
+    mock_cursor.fetchall.return_value = [
+        {'Owner_ID': i, 'Owner_Name': f'Owner {i}', 'Owner_Email': None, 'PhoneNUMB': str(i), 'car_count': 0}
+        for i in range(150)
+    ]
+    
+    response = authenticated_session.get('/mechanic/api/all-owners')
+    assert response.status_code == 200
+    assert response.json['count'] == 150
+    assert response.json['has_more'] == False
+    assert response.json['limit'] is None
+    sql = mock_cursor.execute.call_args[0][0]
+    assert 'LIMIT' not in sql
+    assert len(mock_cursor.execute.call_args[0]) == 1
+    _LIST_PAGE_CACHE.clear()
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_get_ownerless_cars_unpaginated_by_default(mock_get_connection, authenticated_session):
+    """Test ownerless cars API without ?limit= returns every row"""
+    from routes.mechanic_routes import _LIST_PAGE_CACHE
+    _LIST_PAGE_CACHE.clear()
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    
+    mock_cursor.fetchall.return_value = [
+        {'Car_plate': f'A{i}', 'Model': 'Civic', 'Year': 2020, 'VIN': None, 'Next_Oil_Change': None}
+        for i in range(120)
+    ]
+    
+    response = authenticated_session.get('/mechanic/api/ownerless-cars')
+    assert response.status_code == 200
+    assert len(response.json['cars']) == 120
+    assert response.json['has_more'] == False
+    assert 'LIMIT' not in mock_cursor.execute.call_args[0][0]
+    _LIST_PAGE_CACHE.clear()
+
+
 @patch('routes.mechanic_routes.get_connection')
 def test_get_ownerless_cars_authenticated(mock_get_connection, authenticated_session):
     """Test get ownerless cars API"""
@@ -776,8 +981,8 @@ def test_delete_owner_authenticated(mock_get_connection, authenticated_session):
     mock_conn.cursor.return_value = mock_cursor
     
     # Mock owner exists and has no admin accounts
-    mock_owner = {'Owner_ID': 1, 'Owner_Name': 'Test Owner', 'PhoneNUMB': '+961123456'}
-    mock_cursor.fetchone.side_effect = [mock_owner, {'car_count': 0}, {'admin_count': 0}]
+    mock_owner = {'Owner_Name': 'Test Owner', 'PhoneNUMB': '+961123456', 'car_count': 0, 'admin_count': 0}
+    mock_cursor.fetchone.return_value = mock_owner
     
     response = authenticated_session.delete('/mechanic/api/owner/1')
     assert response.status_code in [200, 400, 404, 500]
@@ -1086,6 +1291,61 @@ def test_update_appointment_past_date(authenticated_session):
     assert response.status_code in [400, 500]
 
 
+def _future_slot():
+    return {'date': (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d'), 'time': '11:00', 'notes': 'Moved'}
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_update_appointment_updated(mock_get_connection, authenticated_session):
+    """A free slot is written with the single guarded UPDATE and committed"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.rowcount = 1
+
+    response = authenticated_session.put('/mechanic/api/appointments/1', json=_future_slot())
+
+    assert response.status_code == 200
+    assert response.json['appointment_id'] == 1
+    mock_cursor.execute.assert_called_once()
+    mock_conn.commit.assert_called_once()
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_update_appointment_missing(mock_get_connection, authenticated_session):
+    """No row updated and no appointment found returns 404"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.rowcount = 0
+    mock_cursor.fetchone.return_value = None
+
+    response = authenticated_session.put('/mechanic/api/appointments/99', json=_future_slot())
+
+    assert response.status_code == 404
+    assert response.json['success'] == False
+    mock_conn.commit.assert_not_called()
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_update_appointment_slot_taken(mock_get_connection, authenticated_session):
+    """No row updated because another appointment holds the slot returns 409"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.rowcount = 0
+    mock_cursor.fetchone.return_value = {'Date': '2024-01-20', 'Time': timedelta(hours=10), 'has_conflict': 1}
+
+    response = authenticated_session.put('/mechanic/api/appointments/1', json={'date': _future_slot()['date']})
+
+    assert response.status_code == 409
+    assert 'at 10:00' in response.json['message']
+    mock_conn.commit.assert_not_called()
+
+
 # ===============================
 # SERVICE HISTORY TESTS
 # ===============================
@@ -1226,6 +1486,57 @@ def test_add_car_authenticated(mock_get_connection, authenticated_session):
     assert response.status_code in [200, 400, 409]
 
 
+def _existing_owner_car():
+    return {
+        'car_plate': 'A12345',
+        'model': 'Toyota Camry',
+        'year': 2020,
+        'vin': '1HGCM82633A123456',
+        'next_oil_change': '2030-02-01',
+        'owner_type': 'existing',
+        'PhoneNUMB': '+96170123456',
+    }
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_add_car_plate_registered_concurrently(mock_get_connection, authenticated_session):
+    """A duplicate-key error on the car insert (plate taken since the check) returns 409"""
+    from mysql.connector import IntegrityError
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        {'conflict': 'phone', 'Car_plate': None, 'Owner_ID': 5, 'Owner_Name': 'John Doe'}
+    ]
+    mock_cursor.execute.side_effect = [None, IntegrityError("Duplicate entry 'A12345'", errno=1062)]
+
+    response = authenticated_session.post('/mechanic/api/add-car', json=_existing_owner_car())
+
+    assert response.status_code == 409
+    assert 'already exists' in response.json['message']
+    mock_conn.rollback.assert_called()
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_add_car_other_integrity_error(mock_get_connection, authenticated_session):
+    """Integrity errors other than a duplicate key are not reported as conflicts"""
+    from mysql.connector import IntegrityError
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = [
+        {'conflict': 'phone', 'Car_plate': None, 'Owner_ID': 5, 'Owner_Name': 'John Doe'}
+    ]
+    mock_cursor.execute.side_effect = [None, IntegrityError("Cannot add or update a child row", errno=1452)]
+
+    response = authenticated_session.post('/mechanic/api/add-car', json=_existing_owner_car())
+
+    assert response.status_code == 500
+    mock_conn.rollback.assert_called()
+
+
 def test_add_car_invalid_plate(authenticated_session):
     """Test add car with invalid plate number"""
     car_data = {
@@ -1604,6 +1915,34 @@ def test_add_months_function():
     assert result == datetime(2024, 2, 29).date()  # Leap year adjustment
 
 
+def test_phone_strip_table_covers_unicode_whitespace():
+    """Every str.isspace() character is stripped along with '+', '-' and parentheses"""
+    from routes.mechanic_routes import _PHONE_STRIP_TABLE
+    whitespace = ''.join(chr(c) for c in range(0x110000) if chr(c).isspace())
+
+    assert ('+961' + whitespace + '(70)-123456').translate(_PHONE_STRIP_TABLE) == '96170123456'
+
+
+@patch('routes.mechanic_routes.get_connection')
+def test_add_owner_without_car_phone_with_no_break_space(mock_get_connection, authenticated_session):
+    """A phone pasted with no-break spaces passes validation"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_connection.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+    mock_cursor.lastrowid = 21
+    mock_cursor.rowcount = 1
+
+    response = authenticated_session.post('/mechanic/api/owner-without-car', json={
+        'owner_name': 'Bob Smith',
+        'phone_number': '+961\u00a070\u00a0123\u00a0456'
+    })
+
+    assert response.status_code == 200
+    assert response.json['owner_id'] == 21
+
+
 def test_safe_close_function():
     """Test the _safe_close utility function"""
     # Test with None values (should not raise)
@@ -1638,6 +1977,95 @@ def test_safe_close_with_exceptions():
     assert passed, "_safe_close should handle exceptions gracefully"
 
 
+# ===============================
+# DASHBOARD STATS CACHE TESTS
+# ===============================
+
+from routes.mechanic_routes import _DASHBOARD_STATS_CACHE, _DASHBOARD_STATS_STALE, _DASHBOARD_STATS_LOCK
+
+
+@pytest.fixture
+def dashboard_caches():
+    """Start and finish each test with empty dashboard caches"""
+    _DASHBOARD_STATS_CACHE.clear()
+    _DASHBOARD_STATS_STALE.clear()
+    yield
+    _DASHBOARD_STATS_CACHE.clear()
+    _DASHBOARD_STATS_STALE.clear()
+
+
+@patch('routes.mechanic_routes._query_dashboard_stats')
+def test_dashboard_stats_cache_hit(mock_query, authenticated_session, dashboard_caches):
+    """Repeat requests within the TTL are served from the cache"""
+    mock_query.return_value = {"total_cars": 3}
+
+    first = authenticated_session.get('/mechanic/api/dashboard-stats')
+    second = authenticated_session.get('/mechanic/api/dashboard-stats')
+
+    assert first.get_json()["data"] == {"total_cars": 3}
+    assert second.get_json()["data"] == {"total_cars": 3}
+    mock_query.assert_called_once()
+
+
+@patch('routes.mechanic_routes._query_dashboard_stats')
+def test_dashboard_stats_serves_stale_during_refresh(mock_query, authenticated_session, dashboard_caches):
+    """While another request refreshes, the last good counters are returned without querying"""
+    _DASHBOARD_STATS_STALE.set("stats", {"total_cars": 1})
+
+    with _DASHBOARD_STATS_LOCK:  # another request is refreshing
+        response = authenticated_session.get('/mechanic/api/dashboard-stats')
+
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"total_cars": 1}
+    mock_query.assert_not_called()
+
+
+@patch('routes.mechanic_routes._query_dashboard_stats')
+def test_dashboard_stats_refresh(mock_query, authenticated_session, dashboard_caches):
+    """An expired entry is re-queried and both the fresh and stale copies are updated"""
+    _DASHBOARD_STATS_STALE.set("stats", {"total_cars": 1})
+    mock_query.return_value = {"total_cars": 2}
+
+    response = authenticated_session.get('/mechanic/api/dashboard-stats')
+
+    assert response.get_json()["data"] == {"total_cars": 2}
+    assert _DASHBOARD_STATS_CACHE.get("stats") == {"total_cars": 2}
+    assert _DASHBOARD_STATS_STALE.get("stats") == {"total_cars": 2}
+    mock_query.assert_called_once()
+
+
+@patch('routes.car_routes.get_connection')
+@patch('routes.mechanic_routes._query_dashboard_stats')
+def test_dashboard_stats_invalidated_by_car_write(mock_query, mock_car_conn, dashboard_caches):
+    """A car added through the car blueprint shows up in the next dashboard request"""
+    from routes.car_routes import car_bp, _OWNER_ID_CACHE
+
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SECRET_KEY'] = 'test-secret-key'
+    app.register_blueprint(mechanic_bp)
+    app.register_blueprint(car_bp, url_prefix="/api/car")
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['mechanic_logged_in'] = True
+
+    mock_cursor = MagicMock()
+    mock_car_conn.return_value.cursor.return_value = mock_cursor
+    mock_cursor.fetchall.return_value = []
+    mock_cursor.fetchone.return_value = (7,)
+    mock_query.side_effect = [{"total_cars": 1}, {"total_cars": 2}]
+
+    assert client.get('/mechanic/api/dashboard-stats').get_json()["data"] == {"total_cars": 1}
+    response = client.post('/api/car/add', json={
+        "car_plate": "ABC123", "model": "Corolla", "year": 2018,
+        "vin": "1HGBH41JXMN109186", "owner_type": "existing", "PhoneNUMB": "70123456",
+    })
+    assert response.status_code == 201
+
+    assert client.get('/mechanic/api/dashboard-stats').get_json()["data"] == {"total_cars": 2}
+    _OWNER_ID_CACHE.clear()
+
+
 # ===============================
 # RUN ALL TESTS
 # ===============================
@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash
 
 from utils.helpers import serialize, verify_password
+from utils.cache import TTLCache
+from unittest.mock import patch
 
 class TestUtils:
     
@@ -44,4 +46,82 @@ class TestUtils:
     def test_verify_password_none_hash(self):
         """Test password verification with None hash"""
         result = verify_password(None, "anypassword")
-        assert result is False
\ No newline at end of file
+        assert result is False
+
+class TestTTLCache:
+
+    def test_get_set_and_pop(self):
+        """Test basic cache operations"""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert "a" in cache
+        assert cache.pop("a") == 1
+        assert cache.get("a") is None
+
+    def test_entries_expire(self):
+        """Test that entries past their ttl are treated as missing"""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", 1, ttl=0)
+        assert cache.get("a", "missing") == "missing"
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_evicted(self):
+        """Test LRU eviction once maxsize is reached"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+class TestConnectionPool:
+
+    def test_pool_always_resets_sessions(self, monkeypatch):
+        """Test that connections are reset on return so open transactions don't leak"""
+        import utils.database as database
+        monkeypatch.setenv("DB_POOL_RESET_SESSION", "0")
+        monkeypatch.setattr(database, "_POOL", None)
+        with patch("utils.database.pooling.MySQLConnectionPool") as mock_pool:
+            database._get_pool()
+        assert mock_pool.call_args.kwargs["pool_reset_session"] is True
+
+class TestORJSONProvider:
+
+    def test_jsonify_serializes_with_orjson(self, app):
+        """Test jsonify responses go through orjson rather than the stdlib"""
+        from flask import jsonify
+        import utils.json_provider as json_provider
+
+        with patch.object(json_provider.orjson, 'dumps', wraps=json_provider.orjson.dumps) as dumps:
+            with app.test_request_context():
+                response = jsonify({'b': 1, 'a': 'café'})
+
+        assert [c.args[0] for c in dumps.call_args_list].count({'b': 1, 'a': 'café'}) == 1
+        assert response.get_data(as_text=True) == '{"a":"café","b":1}\n'
+
+    def test_jsonify_pretty_print_uses_orjson_indent(self, app):
+        """Test the pretty-printed jsonify output also comes from orjson"""
+        from flask import jsonify
+        import utils.json_provider as json_provider
+
+        app.json.compact = False
+        with patch.object(json_provider.orjson, 'dumps', wraps=json_provider.orjson.dumps) as dumps:
+            with app.test_request_context():
+                response = jsonify({'a': [1]})
+
+        assert [c.args[0] for c in dumps.call_args_list].count({'a': [1]}) == 1
+        assert response.get_data(as_text=True) == '{\n  "a": [\n    1\n  ]\n}\n'
+
+    def test_dates_keep_flask_format(self, app):
+        """Test dates are still rendered by Flask's default handler"""
+        from datetime import date
+        with app.app_context():
+            assert app.json.dumps({'d': date(2024, 1, 2)}) == '{"d":"Tue, 02 Jan 2024 00:00:00 GMT"}'
+
+    def test_other_dump_arguments_fall_back_to_stdlib(self, app):
+        """Test json.dumps arguments orjson can't honour still work"""
+        with app.app_context():
+            assert app.json.dumps({'a': 'café'}, ensure_ascii=True) == '{"a": "caf\\u00e9"}'
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and LRU eviction"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing/expired"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (defaults to the cache ttl)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove key from the cache and return its value"""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        if item is _MISSING:
+            return default
+        return item[0]
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# Read caches over car/owner/service/appointment rows; cleared after any successful write
+_WRITE_CACHES = []
+
+
+def register_write_cache(cache):
+    """Register cache to be cleared by clear_write_caches and return it"""
+    _WRITE_CACHES.append(cache)
+    return cache
+
+
+def clear_write_caches(response):
+    """after_request hook: drop every registered cache after a successful POST/PUT/PATCH/DELETE"""
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+        for cache in _WRITE_CACHES:
+            cache.clear()
+    return response
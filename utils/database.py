@@ -1,10 +1,17 @@
 import os
+import threading
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 import logging
+from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
 def get_db_config():
     """Get database configuration"""
     return {
@@ -12,21 +19,54 @@ def get_db_config():
         "user": os.getenv("DB_USER", "root"),
         "password": os.getenv("DB_PASSWORD", ""),
         "database": os.getenv("DB_NAME", "isd"),
-        "auth_plugin": "mysql_native_password"
+        "auth_plugin": "mysql_native_password",
+        # Use the C extension protocol when it is installed
+        "use_pure": False
     }
 
+def _get_pool():
+    """Create the shared connection pool on first use in each process"""
+    global _POOL, _POOL_PID
+    # A pool inherited across fork() shares sockets with the parent; build a fresh one per worker
+    if _POOL is None or _POOL_PID != os.getpid():
+        with _POOL_LOCK:
+            if _POOL is None or _POOL_PID != os.getpid():
+                config = get_db_config()
+                pool_size = int(os.getenv("DB_POOL_SIZE", 16))
+                # mysql-connector refuses pools larger than CNX_POOL_MAXSIZE
+                if pool_size > pooling.CNX_POOL_MAXSIZE:
+                    logger.warning("DB_POOL_SIZE=%s exceeds the connector limit, using %s", pool_size, pooling.CNX_POOL_MAXSIZE)
+                    pool_size = pooling.CNX_POOL_MAXSIZE
+                logger.info("Creating connection pool for database: %s (size=%s)", config['database'], pool_size)
+                _POOL = pooling.MySQLConnectionPool(
+                    pool_name="isd_pool",
+                    pool_size=pool_size,
+                    # Always reset on return: handlers can hand back a connection with an open
+                    # transaction, which must not leak into the next request
+                    pool_reset_session=True,
+                    **config
+                )
+                _POOL_PID = os.getpid()
+    return _POOL
+
 def get_connection():
-    """Get database connection with error handling"""
+    """Get a pooled database connection with error handling"""
     try:
-        config = get_db_config()
-        logger.info(f"Connecting to database: {config['database']}")
-        return mysql.connector.connect(**config)
+        return _get_pool().get_connection()
+    except PoolError as e:
+        # Pool exhausted - fall back to a dedicated connection rather than failing the request
+        logger.warning("Connection pool unavailable, opening direct connection: %s", e)
+        try:
+            return mysql.connector.connect(**get_db_config())
+        except Error as e:
+            logger.error("Database connection error: %s", e)
+            raise
     except Error as e:
         logger.error(f"Database connection error: {e}")
         raise
 
 def _safe_close(cursor=None, conn=None):
-    """Safely close database connections"""
+    """Safely close database connections (pooled connections are returned to the pool)"""
     try:
         if cursor:
             cursor.close()
@@ -38,6 +78,23 @@ def _safe_close(cursor=None, conn=None):
     except Exception as e:
         logger.warning(f"Error closing connection: {e}")
 
+@contextmanager
+def transaction(conn):
+    """Run a block as one transaction: commit when it finishes, roll back if it raises"""
+    if conn.autocommit:
+        conn.start_transaction()
+    try:
+        yield
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception as e:
+            logger.warning("Error rolling back transaction: %s", e)
+        raise
+    # Nothing left to commit if the block already rolled back
+    if conn.in_transaction:
+        conn.commit()
+
 def get_car_info(plate_number):
     """Get car information from database by license plate - USING YOUR ACTUAL SCHEMA"""
     conn = None
@@ -0,0 +1,39 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson.
+
+    Dates are passed through to Flask's default handler so responses keep
+    the same wire format as the stdlib-backed provider. Unlike Flask's
+    ensure_ascii default, non-ASCII text is emitted as UTF-8 rather than
+    \\uXXXX escapes; both decode to the same JSON.
+    """
+
+    _OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS
+    )
+    _COMPACT_SEPARATORS = (",", ":")
+
+    def dumps(self, obj, **kwargs):
+        # jsonify() asks for compact separators, or indent=2 when pretty-printing;
+        # orjson covers both, anything else is left to the stdlib
+        extra = kwargs.keys() - {"separators", "indent"}
+        separators = tuple(kwargs.get("separators", self._COMPACT_SEPARATORS))
+        indent = kwargs.get("indent")
+        if extra or separators != self._COMPACT_SEPARATORS or indent not in (None, 2):
+            return super().dumps(obj, **kwargs)
+        option = self._OPTIONS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,23 @@
+from flask import request
+from flask.sessions import SecureCookieSessionInterface
+
+
+def session_read_only(view):
+    """Mark a view as only reading the session.
+
+    Unless the view actually modifies the session, its response will not
+    re-sign and re-send the session cookie.
+    """
+    view.session_read_only = True
+    return view
+
+
+class ReadOnlyAwareSessionInterface(SecureCookieSessionInterface):
+    """Cookie session interface that skips the cookie refresh on read-only views"""
+
+    def should_set_cookie(self, app, session):
+        if not session.modified:
+            view = app.view_functions.get(request.endpoint)
+            if getattr(view, "session_read_only", False):
+                return False
+        return super().should_set_cookie(app, session)